@@ -0,0 +1,164 @@
+import java.io.BufferedReader;
+import java.io.File;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.InputStreamReader;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+import java.util.concurrent.TimeUnit;
+import java.util.concurrent.TimeoutException;
+
+/**
+ * Runs one trigger test once per Major mutant id read from stdin, inside a
+ * single JVM. Used by run_mutation_repair.py.
+ *
+ * Usage: java -cp <runner>:<test cp> BatchMutantRunner <TestClass[::method]> [threads]
+ * Protocol: one mutant id per input line, answered by "OK <id>" or "FAIL <id>".
+ * Exits with status 2 if major.rt.Config.__M_NO cannot be set: mutants could not
+ * be switched inside one JVM, so the caller must run one JVM per mutant instead.
+ *
+ * Every mutant runs in a throwaway class loader over the same class path, so
+ * it gets its own major.rt.Config and fresh static state: static initializers
+ * run under that mutant, and nothing a previous mutant's test left in a static
+ * field leaks into its verdict. With threads > 1, mutants run concurrently and
+ * answers arrive in completion order. JVM-wide state is still shared between
+ * concurrent tests (default Locale and TimeZone, system properties, System.out
+ * and System.err), so tests that change it can get flaky verdicts.
+ *
+ * A mutant whose test runs longer than -Dbatch.timeout seconds (default 60)
+ * answers FAIL; its thread is interrupted and left to die with the JVM.
+ */
+public class BatchMutantRunner {
+
+    /** Exit status when the classes are not Major-compiled (no major.rt.Config.__M_NO). */
+    static final int EXIT_NO_MAJOR = 2;
+
+    /** Seconds one mutant's trigger test may run before it counts as failing. */
+    static final long TIMEOUT_SECONDS = Long.getLong("batch.timeout", 60);
+
+    /** Runs the tests; daemon threads, so a test stuck after its timeout cannot block exit. */
+    private static final ExecutorService TESTS = Executors.newCachedThreadPool(r -> {
+        Thread t = new Thread(r);
+        t.setDaemon(true);
+        return t;
+    });
+
+    public static void main(String[] args) throws Exception {
+        String[] spec = args[0].split("::", 2);
+        int threads = args.length > 1 ? Integer.parseInt(args[1]) : 1;
+
+        // Keep the real stdout for the protocol; test output is discarded
+        PrintStream reply = new PrintStream(new FileOutputStream(FileDescriptor.out), true);
+        System.setOut(new PrintStream(OutputStream.nullOutputStream()));
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in));
+
+        URL[] urls = classPathUrls();
+        if (threads > 1) {
+            runConcurrent(urls, spec, threads, in, reply);
+        } else {
+            runSequential(urls, spec, in, reply);
+        }
+        // Non-daemon threads left behind by a test must not keep the JVM alive
+        reply.flush();
+        System.exit(0);
+    }
+
+    /** The application class path, for the per-mutant class loaders. */
+    private static URL[] classPathUrls() throws Exception {
+        String[] entries = System.getProperty("java.class.path").split(File.pathSeparator);
+        URL[] urls = new URL[entries.length];
+        for (int i = 0; i < entries.length; i++) {
+            urls[i] = new File(entries[i]).toURI().toURL();
+        }
+        return urls;
+    }
+
+    /** Runs mutants one after another, answering each before reading the next. */
+    private static void runSequential(URL[] urls, String[] spec, BufferedReader in, PrintStream reply)
+            throws Exception {
+        String line;
+        while ((line = in.readLine()) != null) {
+            String id = line.trim();
+            if (id.isEmpty()) continue;
+            reply.println((runWithTimeout(urls, spec, id) ? "OK " : "FAIL ") + id);
+        }
+    }
+
+    /** Runs mutants on a thread pool. */
+    private static void runConcurrent(URL[] urls, String[] spec, int threads, BufferedReader in,
+                                      PrintStream reply) throws Exception {
+        ExecutorService pool = Executors.newFixedThreadPool(threads);
+        String line;
+        while ((line = in.readLine()) != null) {
+            String id = line.trim();
+            if (id.isEmpty()) continue;
+            pool.submit(() -> reply.println((runWithTimeout(urls, spec, id) ? "OK " : "FAIL ") + id));
+        }
+        pool.shutdown();
+        pool.awaitTermination(Long.MAX_VALUE, TimeUnit.DAYS);
+    }
+
+    /** Runs one mutant's test, failing it after TIMEOUT_SECONDS (e.g. an infinite loop). */
+    private static boolean runWithTimeout(URL[] urls, String[] spec, String id) {
+        Future<Boolean> test = TESTS.submit(() -> runInFreshLoader(urls, spec, id));
+        try {
+            return test.get(TIMEOUT_SECONDS, TimeUnit.SECONDS);
+        } catch (TimeoutException e) {
+            test.cancel(true);
+            return false;
+        } catch (InterruptedException | ExecutionException e) {
+            return false;
+        }
+    }
+
+    /** Serializes the major.mutant property between loaders initializing their Config. */
+    private static final Object CONFIG_INIT = new Object();
+
+    /** JUnit is loaded in the fresh loader too, so it is driven by reflection. */
+    private static boolean runInFreshLoader(URL[] urls, String[] spec, String id) {
+        Thread current = Thread.currentThread();
+        ClassLoader previous = current.getContextClassLoader();
+        try (URLClassLoader loader = new URLClassLoader(urls, ClassLoader.getPlatformClassLoader())) {
+            current.setContextClassLoader(loader);
+            activate(loader, id);
+            Class<?> testClass = loader.loadClass(spec[0]);
+            Class<?> requestClass = loader.loadClass("org.junit.runner.Request");
+            Object request = spec.length == 2
+                    ? requestClass.getMethod("method", Class.class, String.class).invoke(null, testClass, spec[1])
+                    : requestClass.getMethod("aClass", Class.class).invoke(null, testClass);
+            Class<?> coreClass = loader.loadClass("org.junit.runner.JUnitCore");
+            Object result = coreClass.getMethod("run", requestClass)
+                    .invoke(coreClass.getConstructor().newInstance(), request);
+            return (Boolean) result.getClass().getMethod("wasSuccessful").invoke(result);
+        } catch (Throwable t) {
+            return false;
+        } finally {
+            current.setContextClassLoader(previous);
+        }
+    }
+
+    /** Initializes the loader's own major.rt.Config with mutant `id` enabled. */
+    private static void activate(ClassLoader loader, String id) {
+        try {
+            synchronized (CONFIG_INIT) {
+                System.setProperty("major.mutant", id);
+                Class<?> config = Class.forName("major.rt.Config", true, loader);
+                config.getField("__M_NO").setInt(null, Integer.parseInt(id));
+            }
+        } catch (ReflectiveOperationException e) {
+            noMajor(e);
+        }
+    }
+
+    /** Verdicts without an active mutant would all be wrong: stop instead. */
+    private static void noMajor(ReflectiveOperationException e) {
+        System.err.println("BatchMutantRunner: cannot set major.rt.Config.__M_NO (" + e + ")");
+        System.exit(EXIT_NO_MAJOR);
+    }
+}
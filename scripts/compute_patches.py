@@ -3,65 +3,153 @@ import os
 import csv
 import argparse
 from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
 
 def read_kill_file(kill_path):
+    """
+    Return {mutant_id: STATUS} from kill.csv. The file is read with one
+    call and split on bytes; csv.reader is only used if it contains quotes.
+    """
+    with open(kill_path, "rb", buffering=1 << 20) as f:
+        data = f.read()
+
+    if b'"' in data:
+        rows = csv.reader(data.decode("utf-8").splitlines()[1:])  # skip header
+        return {
+            int(row[0]): row[1].strip().upper()
+            for row in rows
+            if len(row) >= 2 and row[0].strip().isdigit()
+        }
+
     status_by_id = {}
-    with open(kill_path, newline='', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        next(reader, None)  # skip header
-        for row in reader:
-            if len(row) < 2:
-                continue
-            try:
-                mid = int(row[0])
-            except Exception:
-                continue
-            status_by_id[mid] = row[1].strip().upper()
+    for r in data.split(b"\n")[1:]:  # skip header
+        i = r.find(b",")
+        if i < 0:
+            continue
+        mid = r[:i].strip()
+        if not mid.isdigit():
+            continue
+        j = r.find(b",", i + 1)
+        status = r[i + 1:j] if j >= 0 else r[i + 1:]
+        status_by_id[int(mid)] = status.strip().upper().decode("utf-8", errors="replace")
     return status_by_id
 
 
-def read_mutants_log(mutants_path):
+def read_kill_live_ids(kill_path):
+    """
+    Single pass over kill.csv that only keeps LIVE ids.
+    Returns (live_ids, total, incorrect) without building the full status map.
+    """
+    with open(kill_path, "rb", buffering=1 << 20) as f:
+        data = f.read()
+
+    if b'"' in data:  # quoted CSV: let read_kill_file/csv handle it
+        status = read_kill_file(kill_path)
+        live_ids = {m for m, s in status.items() if s == "LIVE"}
+        return live_ids, len(status), len(status) - len(live_ids)
+
+    live_ids = set()
+    add = live_ids.add
+    total = 0
+    for r in data.split(b"\n")[1:]:  # skip header
+        i = r.find(b",")
+        if i < 0:
+            continue
+        mid = r[:i].strip()
+        if not mid.isdigit():
+            continue
+        total += 1
+        j = r.find(b",", i + 1)
+        status = r[i + 1:j] if j >= 0 else r[i + 1:]
+        if status.strip().upper() == b"LIVE":
+            add(int(mid))
+    return live_ids, total, total - len(live_ids)
+
+
+def read_mutants_log(mutants_path, wanted_ids):
+    """
+    Return {mutant_id: operator} for the ids in wanted_ids only; every other
+    line is skipped before int()/strip() are paid for it.
+    """
     op_by_id = {}
-    if not os.path.exists(mutants_path):
+    if not os.path.exists(mutants_path) or not wanted_ids:
         return op_by_id
 
-    with open(mutants_path, encoding="utf-8") as f:
+    # Binary mode with a large buffer: ids and operators are ASCII, so only
+    # the operator slice of a wanted line is ever decoded.
+    # Method lookups are bound once, outside the per-line loop.
+    find, strip, isdigit = bytes.find, bytes.strip, bytes.isdigit
+    _int = int
+    with open(mutants_path, "rb", buffering=1 << 20) as f:
         for line in f:
-            line = line.strip()
-            if ":" not in line:
+            idx = find(line, b":")
+            if idx < 0:
                 continue
-            parts = line.split(":", 2)
-            try:
-                mid = int(parts[0])
-            except Exception:
+            mid_str = strip(line[:idx])
+            if not isdigit(mid_str):
                 continue
-            op = parts[1].strip()
-            op_by_id[mid] = op
+            mid = _int(mid_str)
+            if mid not in wanted_ids:
+                continue
+            end = find(line, b":", idx + 1)
+            op = strip(line[idx + 1:end] if end >= 0 else line[idx + 1:])
+            op_by_id[mid] = op.decode("ascii", errors="replace")
     return op_by_id
 
 
 def discover_bug_dirs(logs_root):
-    bug_dirs = []
-    for name in os.listdir(logs_root):
-        full = os.path.join(logs_root, name)
-        if os.path.isdir(full) and "-" in name:
-            project = name.split("-", 1)[0]
-            bug_dirs.append((project, name, full))
+    # DirEntry.is_dir() uses the d_type from readdir, so no stat per entry
+    with os.scandir(logs_root) as it:
+        bug_dirs = [
+            (e.name.split("-", 1)[0], e.name, e.path)
+            for e in it
+            if "-" in e.name and e.is_dir()
+        ]
     bug_dirs.sort(key=lambda x: (x[0], x[1]))
     return bug_dirs
 
 
+_dirs_made = set()
+
+
+def ensure_dir(path):
+    """os.makedirs(path, exist_ok=True), issued at most once per directory."""
+    if path not in _dirs_made:
+        os.makedirs(path, exist_ok=True)
+        _dirs_made.add(path)
+
+
 def write_csv(path, header, rows):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", newline="", encoding="utf-8") as f:
+    ensure_dir(os.path.dirname(path))
+    with open(path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
         w = csv.writer(f)
         w.writerow(header)
-        for row in rows:
-            w.writerow(row)
+        w.writerows(rows)
 
 
-def run_for_logs_root(logs_root, project_filter=None):
+def process_bug(project, bug_name, bug_dir):
+    """
+    Parse one bug folder. Returns
+    (project, bug_name, total, plausible, incorrect, op_counter),
+    or None when the folder has no kill.csv.
+    """
+    kill_path = os.path.join(bug_dir, "kill.csv")
+    mutants_path = os.path.join(bug_dir, "mutants.log")
+
+    if not os.path.exists(kill_path):
+        return None
+
+    plausible_ids, total, incorrect = read_kill_live_ids(kill_path)
+
+    ops = read_mutants_log(mutants_path, plausible_ids)
+    op_get = ops.get
+    op_list = [op_get(mid, "UNKNOWN") for mid in plausible_ids]
+
+    return project, bug_name, total, len(plausible_ids), incorrect, Counter(op_list)
+
+
+def run_for_logs_root(logs_root, project_filter=None, jobs=1, sort_by="op"):
     """
     Process a single logs root (e.g., logs_lang/) and write CSVs to results/<Project>/.
     """
@@ -77,7 +165,7 @@ def run_for_logs_root(logs_root, project_filter=None):
         print(f"[WARN] No matching bug dirs in {logs_root} (project_filter={project_filter})")
         return
 
-    per_bug_rows = []
+    per_project_bug_rows = defaultdict(list)
     per_project = defaultdict(lambda: {
         "bugs": 0,
         "total": 0,
@@ -87,41 +175,37 @@ def run_for_logs_root(logs_root, project_filter=None):
     per_operator = defaultdict(Counter)
 
     # ---- Process each bug folder ----
-    for project, bug_name, bug_dir in bug_dirs:
-        kill_path = os.path.join(bug_dir, "kill.csv")
-        mutants_path = os.path.join(bug_dir, "mutants.log")
+    projects, bug_names, paths = zip(*bug_dirs)
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            results = list(ex.map(process_bug, projects, bug_names, paths, chunksize=8))
+    else:
+        results = list(map(process_bug, projects, bug_names, paths))
 
-        if not os.path.exists(kill_path):
+    for res in results:
+        if res is None:
             continue
+        project, bug_name, total, plausible, incorrect, op_counter = res
+        per_operator[project].update(op_counter)
 
-        status = read_kill_file(kill_path)
-        total = len(status)
-        plausible_ids = [m for m, s in status.items() if s == "LIVE"]
-        incorrect = total - len(plausible_ids)
-
-        ops = read_mutants_log(mutants_path)
-        for mid in plausible_ids:
-            op = ops.get(mid, "UNKNOWN")
-            per_operator[project][op] += 1
-
-        per_bug_rows.append([project, bug_name, total, len(plausible_ids), incorrect])
+        per_project_bug_rows[project].append([project, bug_name, total, plausible, incorrect])
 
         per_project[project]["bugs"] += 1
         per_project[project]["total"] += total
-        per_project[project]["plausible"] += len(plausible_ids)
+        per_project[project]["plausible"] += plausible
         per_project[project]["incorrect"] += incorrect
 
     # ---- Prepare CSV files ----
     for project in sorted(per_project.keys()):
         out_dir = os.path.join("results", project)
-        os.makedirs(out_dir, exist_ok=True)
+        ensure_dir(out_dir)
 
         # 1. per bug
         bug_csv = os.path.join(out_dir, "per_bug_summary.csv")
         write_csv(
             bug_csv,
             ["Project", "Bug", "TotalMutants", "Plausible(LIVE)", "Incorrect"],
-            [row for row in per_bug_rows if row[0] == project],
+            per_project_bug_rows[project],
         )
 
         # 2. per project
@@ -135,7 +219,11 @@ def run_for_logs_root(logs_root, project_filter=None):
 
         # 3. operator usage
         op_csv = os.path.join(out_dir, "operator_usage.csv")
-        op_rows = [[project, op, cnt] for op, cnt in sorted(per_operator[project].items())]
+        if sort_by == "count":
+            op_items = per_operator[project].most_common()
+        else:
+            op_items = sorted(per_operator[project].items())
+        op_rows = [[project, op, cnt] for op, cnt in op_items]
         write_csv(op_csv, ["Project", "Operator", "PlausibleCount"], op_rows)
 
         print(f"✔ CSV files written to: {out_dir}/")
@@ -145,11 +233,8 @@ def discover_all_logs_roots(base_dir="."):
     """
     Find all directories named 'logs_*' under base_dir (e.g., logs_lang, logs_math, ...).
     """
-    roots = []
-    for name in os.listdir(base_dir):
-        full = os.path.join(base_dir, name)
-        if os.path.isdir(full) and name.startswith("logs_"):
-            roots.append(full)
+    with os.scandir(base_dir) as it:
+        roots = [e.path for e in it if e.name.startswith("logs_") and e.is_dir()]
     roots.sort()
     return roots
 
@@ -163,14 +248,21 @@ if __name__ == "__main__":
         action="store_true",
         help="If set, automatically process all logs_* directories under the current folder."
     )
+    parser.add_argument("--jobs", type=int, default=1, help="Number of bug folders to parse in parallel (processes).")
+    parser.add_argument(
+        "--sort",
+        choices=["op", "count"],
+        default="op",
+        help="Row order of operator_usage.csv: by operator name (default) or by count, descending."
+    )
     args = parser.parse_args()
 
     if args.all_projects:
         # Example usage: python3 compute_patches.py --all-projects
         for root in discover_all_logs_roots("."):
             print(f"\n=== Processing logs root: {root} ===")
-            run_for_logs_root(root, project_filter=None)
+            run_for_logs_root(root, project_filter=None, jobs=args.jobs, sort_by=args.sort)
     else:
         # Single logs root (old behaviour)
         logs_root = args.logs_root or "logs"
-        run_for_logs_root(logs_root, args.project or None)
+        run_for_logs_root(logs_root, args.project or None, jobs=args.jobs, sort_by=args.sort)
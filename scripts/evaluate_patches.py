@@ -13,7 +13,7 @@ Usage:
   python3 export_dev_patches_all.py Lang Mockito --force
 """
 
-import os, re, sys, subprocess, argparse
+import os, sys, subprocess, argparse
 from pathlib import Path
 
 # === Configuration ===
@@ -110,7 +110,7 @@ def list_bugs(project: str):
     ids = []
     with path.open("r", encoding="utf-8", errors="ignore") as f:
         for line in f:
-            if re.match(r"^\d+", line):
+            if line[:1].isdigit():
                 ids.append(line.strip().split(",")[0])
     return sorted(set(ids), key=lambda x: int(x))
 
@@ -10,10 +10,15 @@ Usage:
   # export diffs for specific project(s)
   python3 export_dev_patches_all.py JxPath
   python3 export_dev_patches_all.py Lang Mockito --force
+
+  # run up to 4 checkouts / diffs at a time
+  python3 export_dev_patches_all.py Lang --jobs 4
 """
 
-import os, re, sys, subprocess, argparse
+import os, io, sys, gzip, time, shlex, shutil, difflib, filecmp, fnmatch, tempfile, subprocess, argparse
+from functools import lru_cache
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
 # === Configuration ===
 D4J_HOME  = os.environ.get("D4J_HOME", "cd to directory/defects4j")
@@ -21,6 +26,7 @@ DEFECTS4J = f"{D4J_HOME}/framework/bin/defects4j"
 EXPROOT   = Path(os.environ.get("EXPERIMENT_ROOT", "/cd to directory/my_mutation_experiments"))
 
 WORK      = EXPROOT / "d4j_work_diff"
+CACHE     = EXPROOT / "d4j_cache"   # shared checkouts, used with --cache-dir
 OUT_ROOT  = EXPROOT / "results" / "dev_patches"
 
 # Projects you might want to skip (keep empty unless needed)
@@ -33,6 +39,9 @@ EXCLUDES = [
     "*.class", "*.jar", "*.war", "*.ear", "*.zip", "*.tar", "*.gz"
 ]
 
+# Max concurrent `defects4j checkout` processes and diff worker processes
+DEFAULT_JOBS = min(os.cpu_count() or 1, 8)
+
 # === Helpers ===
 def env_java11() -> dict:
     """Return an environment with Java 11 first on PATH and stable English locale."""
@@ -98,37 +107,238 @@ def preflight_java():
         )
 
 
+@lru_cache(maxsize=None)
 def list_detected_projects():
     root = Path(D4J_HOME) / "framework" / "projects"
     if not root.exists():
-        return []
-    return sorted([d.name for d in root.iterdir() if d.is_dir() and (d / "active-bugs.csv").exists()])
+        return ()
+    return tuple(sorted(d.name for d in root.iterdir() if d.is_dir() and (d / "active-bugs.csv").exists()))
 
 
+@lru_cache(maxsize=None)
 def list_bugs(project: str):
     path = Path(D4J_HOME) / "framework" / "projects" / project / "active-bugs.csv"
     if not path.exists():
         print(f"[WARN] Skipping {project}: no active-bugs.csv at {path}")
-        return []
-    ids = []
+        return ()
     with path.open("r", encoding="utf-8", errors="ignore") as f:
-        for line in f:
-            if re.match(r"^\d+", line):
-                ids.append(line.strip().split(",")[0])
-    return sorted(set(ids), key=lambda x: int(x))
+        ids = {ln.split(",", 1)[0].strip() for ln in f if ln[:1].isdigit()}
+    return tuple(sorted(ids, key=int))
+
+
+# Written into a checkout only after `defects4j checkout` succeeded
+CHECKOUT_MARKER = ".d4j_ok"
+
+
+def _remove_partial(w: Path):
+    if w.is_symlink():
+        w.unlink()
+    elif w.exists():
+        shutil.rmtree(w)
+
+
+def _checkout_plan(project: str, bug: str, rev: str, cache_dir=None):
+    """
+    Decide where (project, bug, rev) is checked out. Returns (w, target, cmd);
+    cmd is None when a completed checkout can be reused.
+    """
+    name = f"{project}-{bug}-{rev}"
+    w = WORK / name
+    if (w / CHECKOUT_MARKER).exists():
+        return w, w, None
+
+    target = w
+    if cache_dir:
+        target = Path(cache_dir) / name
+        if (target / CHECKOUT_MARKER).exists():
+            _finish_checkout(w, target)
+            return w, target, None
+
+    _remove_partial(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    return w, target, [DEFECTS4J, "checkout", "-p", project, "-v", f"{bug}{rev}", "-w", str(target)]
+
+
+def _finish_checkout(w: Path, target: Path):
+    """Mark a finished checkout and, for cached checkouts, link it into WORK."""
+    marker = target / CHECKOUT_MARKER
+    if not marker.exists():
+        marker.write_text("1")
+    if target != w:
+        _remove_partial(w)
+        os.symlink(target, w)
+
+
+def checkout_many(tasks, jobs: int, cache_dir=None):
+    """
+    Check out every (project, bug, rev) in `tasks` with up to `jobs` concurrent
+    `defects4j checkout` processes. stdout is discarded and stderr goes to a temp
+    file that is only read (and printed) if the checkout fails. A failure does not
+    stop the other checkouts. Returns ({(bug, rev): Path}, {(bug, rev): error}).
+    """
+    env = env_java11()
+    trees, running, failures = {}, [], {}
+
+    def reap():
+        """Waits for one running checkout to finish and records its result."""
+        while running:
+            for item in running:
+                proc, cmd, errf, key, w, target = item
+                if proc.poll() is None:
+                    continue
+                running.remove(item)
+                if proc.returncode == 0:
+                    _finish_checkout(w, target)
+                    trees[key] = w
+                else:
+                    errf.seek(0)
+                    err = errf.read().decode("utf-8", errors="replace")
+                    failures[key] = f"Failed: {' '.join(cmd)}\nSTDERR:\n{err}"
+                    print(f"[WARN] checkout of {''.join(key)} failed")
+                    try:
+                        sys.stderr.write(failures[key])
+                    except Exception:
+                        pass
+                errf.close()
+                return
+            time.sleep(0.05)
+
+    for project, bug, rev in tasks:
+        w, target, cmd = _checkout_plan(project, bug, rev, cache_dir)
+        if cmd is None:
+            trees[bug, rev] = w
+            continue
+        while len(running) >= max(1, jobs):
+            reap()
+        print(">>>", " ".join(cmd))
+        errf = tempfile.TemporaryFile()
+        proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=errf)
+        running.append((proc, cmd, errf, (bug, rev), w, target))
 
+    while running:
+        reap()
+    return trees, failures
+
+
+def _diff_stamp(path):
+    """File timestamp in the format GNU diff prints in ---/+++ headers (epoch for a missing file)."""
+    ns = os.stat(path).st_mtime_ns if path is not None else 0
+    t = time.localtime(ns // 1_000_000_000)
+    return f"{time.strftime('%Y-%m-%d %H:%M:%S', t)}.{ns % 1_000_000_000:09d} {time.strftime('%z', t)}"
 
-def checkout(project: str, bug: str, rev: str) -> Path:
-    """rev in {'b','f'}"""
-    env = env_java11()
-    w = WORK / f"{project}-{bug}-{rev}"
-    if not w.exists():
-        run([DEFECTS4J, "checkout", "-p", project, "-v", f"{bug}{rev}", "-w", str(w)],
-            env=env, quiet=False, check=True)
-    return w
 
+def _split_lines(data: bytes):
+    # Only '\n' ends a line (bytes.splitlines would also split on '\r')
+    parts = data.split(b"\n")
+    lines = [p + b"\n" for p in parts[:-1]]
+    if parts[-1]:
+        lines.append(parts[-1])
+    return lines
 
-def export_project(project: str, force: bool = False):
+
+def _write_file_pair(out, bpath, fpath, bexists, fexists, header):
+    """Write the unified diff of one file pair to `out`, treating a missing side as empty (like `diff -N`)."""
+    bdata = Path(bpath).read_bytes() if bexists else b""
+    fdata = Path(fpath).read_bytes() if fexists else b""
+    if b"\0" in bdata[:8192] or b"\0" in fdata[:8192]:
+        out.write(f"Binary files {bpath} and {fpath} differ\n".encode())
+        return
+
+    out.write(header.encode())
+    hunks = difflib.diff_bytes(
+        difflib.unified_diff, _split_lines(bdata), _split_lines(fdata),
+        os.fsencode(bpath), os.fsencode(fpath),
+        _diff_stamp(bpath if bexists else None).encode(),
+        _diff_stamp(fpath if fexists else None).encode(),
+    )
+    for line in hunks:
+        out.write(line)
+        if not line.endswith(b"\n"):
+            out.write(b"\n\\ No newline at end of file\n")
+
+
+def write_tree_diff(out, bdir, fdir, excludes, diff_args=None) -> bool:
+    """
+    In-process replacement for `diff -ruN --exclude ... bdir fdir`, streamed to the binary file `out`.
+    Returns True if any difference was written.
+    Files of different size are known to differ without reading them; equal-size
+    pairs are compared chunk-wise (stopping at the first mismatch) and only the
+    pairs that really differ are read and rendered with difflib.
+    """
+    diff_args = diff_args or ["diff", "-ruN"]
+
+    def excluded(name):
+        return any(fnmatch.fnmatchcase(name, pat) for pat in excludes)
+
+    def entries(d):
+        if d is None:
+            return {}
+        with os.scandir(d) as it:
+            return {e.name: e for e in it if not excluded(e.name)}
+
+    changed = False
+
+    def walk(b, f, brel, frel):
+        nonlocal changed
+        bents, fents = entries(b), entries(f)
+        for name in sorted(set(bents) | set(fents)):
+            be, fe = bents.get(name), fents.get(name)
+            bpath = os.path.join(brel, name)
+            fpath = os.path.join(frel, name)
+            bdir_ = be is not None and be.is_dir()
+            fdir_ = fe is not None and fe.is_dir()
+            if bdir_ or fdir_:
+                if (be is not None and not bdir_) or (fe is not None and not fdir_):
+                    kind_b = "directory" if bdir_ else "regular file"
+                    kind_f = "directory" if fdir_ else "regular file"
+                    out.write(f"File {bpath} is a {kind_b} while file {fpath} is a {kind_f}\n".encode())
+                    changed = True
+                    continue
+                walk(be.path if be else None, fe.path if fe else None, bpath, fpath)
+                continue
+
+            if be is not None and fe is not None:
+                if be.stat().st_size == fe.stat().st_size and filecmp.cmp(be.path, fe.path, shallow=False):
+                    continue
+            header = " ".join(shlex.quote(a) for a in diff_args + [bpath, fpath]) + "\n"
+            _write_file_pair(out, bpath, fpath, be is not None, fe is not None, header)
+            changed = True
+
+    walk(str(bdir), str(fdir), str(bdir), str(fdir))
+    return changed
+
+
+def fast_tree_diff(bdir, fdir, excludes, diff_args=None) -> bytes:
+    """Same as write_tree_diff, but returns the diff as bytes."""
+    buf = io.BytesIO()
+    write_tree_diff(buf, bdir, fdir, excludes, diff_args)
+    return buf.getvalue()
+
+
+def _diff_task(task):
+    """Diff one bug's trees and return (stdout lines, stderr text) for in-order printing."""
+    project, bug, bdir, fdir, diff_args, diff_path = task
+    out = [">>> " + " ".join(diff_args + [str(bdir), str(fdir)])]
+    err = ""
+    # Hunks are streamed straight to disk (raw bytes to avoid Unicode issues)
+    try:
+        if diff_path.suffix == ".gz":
+            fh = gzip.open(diff_path, "wb", compresslevel=1)
+        else:
+            fh = open(diff_path, "wb", buffering=1 << 20)
+        with fh:
+            changed = write_tree_diff(fh, bdir, fdir, EXCLUDES, diff_args)
+    except OSError as e:
+        diff_path.unlink(missing_ok=True)
+        out.append(f"[WARN] diff failed for {project}-{bug} ({e})")
+        err = f"{e}\n"
+        return out, err
+    out.append(f"[OK] {diff_path} ({'non-empty' if changed else 'empty'})")
+    return out, err
+
+
+def export_project(project: str, force: bool = False, jobs: int = DEFAULT_JOBS, cache_dir=None,
+                   compress: bool = False):
     if project in SKIP_PROJECTS:
         print(f"[SKIP] {project} is disabled in SKIP_PROJECTS.")
         return
@@ -142,34 +352,47 @@ def export_project(project: str, force: bool = False):
     for pat in EXCLUDES:
         diff_prefix += ["--exclude", pat]
 
-    env = env_java11()
     bugs = list_bugs(project)
     if not bugs:
         return
 
     print(f"\n=== Exporting developer diffs for {project} ({len(bugs)} bugs) ===")
+    todo = []
     for bug in bugs:
-        bdir = checkout(project, bug, 'b')
-        fdir = checkout(project, bug, 'f')
-        diff_path = out_dir / f"{project}-{bug}.diff"
-
+        diff_path = out_dir / f"{project}-{bug}.diff{'.gz' if compress else ''}"
         if diff_path.exists() and not force:
             print(f"[SKIP] {diff_path.name} exists (use --force to overwrite)")
             continue
-
-        # raw bytes to avoid Unicode issues
-        cmd = diff_prefix + [str(bdir), str(fdir)]
-        print(">>>", " ".join(cmd))
-        cp = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
-        if cp.returncode in (0, 1):  # 0 = no differences, 1 = differences found
-            diff_path.write_bytes(cp.stdout)
-            print(f"[OK] {diff_path} ({'empty' if cp.returncode == 0 else 'non-empty'})")
-        else:
-            print(f"[WARN] diff failed for {project}-{bug} (code {cp.returncode})")
+        todo.append((bug, diff_path))
+
+    tasks = [(project, bug, rev) for bug, _ in todo for rev in ("b", "f")]
+    trees, failed = checkout_many(tasks, jobs, cache_dir=cache_dir)
+    skipped = sorted({bug for bug, _ in failed}, key=int)
+    if skipped:
+        print(f"[WARN] Skipping {len(skipped)} bug(s) whose checkout failed: {', '.join(skipped)}")
+
+    # Diffs are CPU-bound Python work, so they go to worker processes; bugs with a
+    # failed checkout are left out
+    diffs = [
+        (project, bug, trees[bug, "b"], trees[bug, "f"], diff_prefix, diff_path)
+        for bug, diff_path in todo
+        if bug not in skipped
+    ]
+    with ProcessPoolExecutor(max_workers=max(1, jobs)) as ex:
+        futs = [ex.submit(_diff_task, task) for task in diffs]
+        for task, fut in zip(diffs, futs):
+            # One bug's failure must not cost the rest of the project its diffs
             try:
-                sys.stderr.write(cp.stderr.decode('utf-8', errors='replace'))
-            except Exception:
-                pass
+                out, err = fut.result()
+            except Exception as e:
+                out, err = [f"[WARN] diff failed for {project}-{task[1]} ({e})"], ""
+            for line in out:
+                print(line)
+            if err:
+                try:
+                    sys.stderr.write(err)
+                except Exception:
+                    pass
 
     print(f"[DONE] All diffs saved in: {out_dir}\n")
 
@@ -182,6 +405,12 @@ def main():
     ap.add_argument("projects", nargs="*", help="Projects to export (e.g., JxPath Lang). Required unless --list.")
     ap.add_argument("--force", action="store_true", help="Overwrite existing .diff files.")
     ap.add_argument("--list", action="store_true", help="List detected projects and exit.")
+    ap.add_argument("--jobs", type=int, default=DEFAULT_JOBS,
+                    help=f"Parallel checkouts/diffs (default: {DEFAULT_JOBS}).")
+    ap.add_argument("--gzip", action="store_true", help="Write gzip-compressed .diff.gz files.")
+    ap.add_argument("--cache-dir", nargs="?", const=str(CACHE), default=None,
+                    help=f"Keep checkouts in a shared cache and symlink them into the work dir "
+                         f"(default when given without a value: {CACHE}).")
     args = ap.parse_args()
 
     # Preflight first so we fail fast if Java/Defects4J is off
@@ -217,7 +446,8 @@ def main():
     print(f"[INFO] Projects to export: {' '.join(projects)}")
     for proj in projects:
         try:
-            export_project(proj, force=args.force)
+            export_project(proj, force=args.force, jobs=args.jobs, cache_dir=args.cache_dir,
+                           compress=args.gzip)
         except Exception as e:
             print(f"[ERROR] Failed to export for {proj}: {e}")
 
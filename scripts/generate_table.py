@@ -14,8 +14,9 @@ import os
 import csv
 import sys
 import re
+from array import array
 from pathlib import Path
-from collections import defaultdict
+from collections import Counter
 from typing import Tuple, Dict, List
 
 # ============================================================
@@ -30,6 +31,12 @@ OPERATOR_MAP = {
     "AOR": "AOR", "SOR": "SOR", "LOR": "LOR", "ORU": "Other", "EVR": "Other"
 }
 KNOWN_OPS = ["ROR", "COR", "LVR", "STD", "AOR", "SOR", "LOR", "Other"]
+OP_INDEX = {op: i for i, op in enumerate(KNOWN_OPS)}
+KILLED_OUTCOMES = frozenset({"KILLED", "TIMEOUT", "MEMORY_ERROR", "RUNTIME_ERROR", "EXC"})
+# Operators with their own column, matched as "<OP>" or "<OP><..."; anything else is "Other"
+_OP_RE = re.compile(r"^(%s)(?:<|$)" % "|".join(op for op, grp in OPERATOR_MAP.items() if grp != "Other"))
+# Mutation log folders are named "<Project>-<BugId>"
+_BUG_DIR_RE = re.compile(r"^([A-Za-z]+)-(\d+)$")
 
 # ============================================================
 # DATA COLLECTION
@@ -44,7 +51,7 @@ class ProjectStats:
         self.total_mutants = 0
         self.killed_mutants = 0
         self.survived_mutants = 0
-        self.live_ops = defaultdict(int)
+        self.live_ops = array("i", [0] * len(KNOWN_OPS))  # indexed by OP_INDEX
         
         # APR Stats (From Results CSV)
         self.apr_generated = 0
@@ -53,10 +60,8 @@ class ProjectStats:
         self.fixed_bug_ids = set()
 
 def normalize_operator(raw_op):
-    base = raw_op.split("<")[0]
-    if base in OPERATOR_MAP:
-        return OPERATOR_MAP[base]
-    return "Other"
+    m = _OP_RE.match(raw_op)
+    return m.group(1) if m else "Other"
 
 def parse_major_details(log_dir: Path) -> Tuple[int, int, int, dict]:
     """Reads mutants.log and kill.csv."""
@@ -72,33 +77,31 @@ def parse_major_details(log_dir: Path) -> Tuple[int, int, int, dict]:
         with kill_csv.open("r", encoding="utf-8", errors="ignore") as f:
             reader = csv.reader(f)
             next(reader, None)
+            add, upper = killed_ids.add, str.upper
             for row in reader:
                 if not row: continue
                 mid = row[0]
-                outcome = row[-1].upper()
-                if outcome in ["KILLED", "TIMEOUT", "MEMORY_ERROR", "RUNTIME_ERROR", "EXC"]:
-                    killed_ids.add(mid)
+                outcome = upper(row[-1])
+                if outcome in KILLED_OUTCOMES:
+                    add(mid)
 
     # 2. Read Definitions
-    total = 0
-    killed = 0
-    survived = 0
-    live_ops = defaultdict(int)
-
-    with mutants_log.open("r", encoding="utf-8", errors="ignore") as f:
-        for line in f:
-            parts = line.strip().split(":")
-            if len(parts) < 2: continue
-            mid = parts[0]
-            raw_op = parts[1]
-            
-            total += 1
-            if mid in killed_ids:
-                killed += 1
-            else:
-                survived += 1
-                op_group = normalize_operator(raw_op)
-                live_ops[op_group] += 1
+    # Split the whole log in one go, count raw operators of surviving mutants
+    # with Counter (C loop), then normalize once per distinct operator.
+    killed_keys = {mid.encode("ascii", errors="ignore") for mid in killed_ids}
+    strip, split = bytes.strip, bytes.split
+    with mutants_log.open("rb", buffering=1 << 20) as f:
+        rows = [split(strip(line), b":", 2) for line in split(f.read(), b"\n")]
+    rows = [parts for parts in rows if len(parts) >= 2]
+
+    total = len(rows)
+    raw_live = Counter(parts[1] for parts in rows if parts[0] not in killed_keys)
+    survived = sum(raw_live.values())
+    killed = total - survived
+
+    live_ops = Counter()
+    for raw_op, count in raw_live.items():
+        live_ops[normalize_operator(raw_op.decode("ascii", errors="ignore"))] += count
 
     return total, killed, survived, live_ops
 
@@ -116,13 +119,22 @@ def load_apr_results(projects: Dict[str, ProjectStats]):
         stats = projects[proj_name]
         
         with csv_file.open("r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header:
+                continue
+            col = {h: i for i, h in enumerate(header)}
+            gi = col.get("Gen_Patches")
+            pi = col.get("Plausible_Patches")
+            ci = col.get("Correct_Patches")
+            bi = col.get("Bug")
             for row in reader:
+                if not row: continue
                 try:
-                    gen = int(row.get("Gen_Patches", 0))
-                    plaus = int(row.get("Plausible_Patches", 0))
-                    corr = int(row.get("Correct_Patches", 0))
-                    bug_id = row.get("Bug")
+                    gen = int(row[gi]) if gi is not None else 0
+                    plaus = int(row[pi]) if pi is not None else 0
+                    corr = int(row[ci]) if ci is not None else 0
+                    bug_id = row[bi] if bi is not None else None
 
                     stats.apr_generated += gen
                     stats.apr_plausible += plaus
@@ -130,7 +142,7 @@ def load_apr_results(projects: Dict[str, ProjectStats]):
                     
                     if plaus > 0 and bug_id:
                         stats.fixed_bug_ids.add(bug_id)
-                except ValueError:
+                except (ValueError, IndexError):
                     continue
 
 def collect_data():
@@ -149,7 +161,7 @@ def collect_data():
 
     for d in sorted_dirs:
         if not d.is_dir(): continue
-        match = re.match(r"^([A-Za-z]+)-(\d+)$", d.name)
+        match = _BUG_DIR_RE.match(d.name)
         if not match: continue
         
         proj_name = match.group(1)
@@ -169,7 +181,7 @@ def collect_data():
             stats.killed_mutants += k
             stats.survived_mutants += s
             for op, count in ops.items():
-                stats.live_ops[op] += count
+                stats.live_ops[OP_INDEX[op]] += count
 
     # 2. Parse APR Results
     load_apr_results(projects)
@@ -180,7 +192,7 @@ def collect_data():
 # SAVING TABLES
 # ============================================================
 
-def save_table_9(projects):
+def save_table_9(projects, names):
     outfile = RESULTS_ROOT / "table9_execution_results.csv"
     print(f"Saving Table 9 to {outfile}...")
     
@@ -197,30 +209,30 @@ def save_table_9(projects):
         writer = csv.writer(f)
         writer.writerow(["Project", "Bugs", "Gen_Patches", "Plausible_Patches", "Correct_Patches", "Fixed_Bugs", "Mutants", "Killed", "Kill_Rate"])
 
-        for name in sorted(projects.keys()):
+        for name in names:
             p = projects[name]
-            if p.total_mutants == 0 and p.apr_generated == 0: continue
+            total, killed = p.total_mutants, p.killed_mutants
+            if total == 0 and p.apr_generated == 0: continue
             
-            rate = p.killed_mutants / p.total_mutants if p.total_mutants > 0 else 0.0
+            n_bugs = len(p.bugs_analyzed)
+            rate = killed / total if total > 0 else 0.0
             fixed_count = len(p.fixed_bug_ids)
             
-            # Console
-            print(header_fmt.format(
-                name, len(p.bugs_analyzed),
-                p.apr_generated, p.apr_plausible, p.apr_correct, fixed_count,
-                p.total_mutants, p.killed_mutants, f"{rate:.2f}"
-            ))
+            # Console (f-string: same layout as header_fmt, no per-row format parsing)
+            print(f"{name:<15} {n_bugs:<6} {p.apr_generated:<10} {p.apr_plausible:<10} "
+                  f"{p.apr_correct:<10} {fixed_count:<10} | {total:<10} {killed:<10} "
+                  f"{rate:<8.2f}")
             
             # CSV
             writer.writerow([
-                name, len(p.bugs_analyzed),
+                name, n_bugs,
                 p.apr_generated, p.apr_plausible, p.apr_correct, fixed_count,
-                p.total_mutants, p.killed_mutants, f"{rate:.2f}"
+                total, killed, f"{rate:.2f}"
             ])
     print("-" * 110)
 
 
-def save_table_10(projects):
+def save_table_10(projects, names):
     outfile = RESULTS_ROOT / "table10_summary.csv"
     print(f"Saving Table 10 to {outfile}...")
 
@@ -235,23 +247,23 @@ def save_table_10(projects):
         writer = csv.writer(f)
         writer.writerow(["Project", "NumBugs", "Total_Mutants", "Plausible_Live", "Incorrect_Killed"])
 
-        for name in sorted(projects.keys()):
+        for name in names:
             p = projects[name]
-            if p.total_mutants == 0: continue
+            total = p.total_mutants
+            if total == 0: continue
             
-            # Console
-            print(header_fmt.format(
-                name, len(p.bugs_analyzed), p.total_mutants, p.survived_mutants, p.killed_mutants
-            ))
+            n_bugs = len(p.bugs_analyzed)
+            survived, killed = p.survived_mutants, p.killed_mutants
+            
+            # Console (f-string: same layout as header_fmt)
+            print(f"{name:<15} {n_bugs:<10} {total:<15} {survived:<15} {killed:<15}")
             
             # CSV
-            writer.writerow([
-                name, len(p.bugs_analyzed), p.total_mutants, p.survived_mutants, p.killed_mutants
-            ])
+            writer.writerow([name, n_bugs, total, survived, killed])
     print("-" * 80)
 
 
-def save_table_11(projects):
+def save_table_11(projects, names):
     outfile = RESULTS_ROOT / "table11_operators.csv"
     print(f"Saving Table 11 to {outfile}...")
 
@@ -269,19 +281,19 @@ def save_table_11(projects):
         # CSV Header: Project, ROR, COR, ...
         writer.writerow(["Project"] + KNOWN_OPS)
 
-        for name in sorted(projects.keys()):
+        for name in names:
             p = projects[name]
             if p.total_mutants == 0: continue
             
-            # Prepare row data
-            row_counts = [p.live_ops.get(op, 0) for op in KNOWN_OPS]
+            # Counts are already laid out in KNOWN_OPS order
+            row_counts = p.live_ops
             
             # Console
-            counts_str = "".join([f"{val:<8}" for val in row_counts])
+            counts_str = "".join(f"{val:<8}" for val in row_counts)
             print(f"{name:<15} {counts_str}")
             
             # CSV
-            writer.writerow([name] + row_counts)
+            writer.writerow((name, *row_counts))
     print("-" * 90)
 
 def main():
@@ -293,9 +305,11 @@ def main():
     # Ensure results dir exists
     RESULTS_ROOT.mkdir(parents=True, exist_ok=True)
 
-    save_table_9(data)
-    save_table_10(data)
-    save_table_11(data)
+    # One sorted project order shared by all tables
+    names = sorted(data)
+    save_table_9(data, names)
+    save_table_10(data, names)
+    save_table_11(data, names)
 
 if __name__ == "__main__":
     main()
@@ -5,9 +5,12 @@ FAST Mutation Repair (Direct JVM Mode).
 Bypasses 'defects4j test' wrapper to run checks 10x-20x faster.
 """
 
-import os, re, csv, sys, shutil, subprocess, argparse, time
+import os, re, csv, sys, json, uuid, shutil, hashlib, threading, subprocess, argparse, time
 from pathlib import Path
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from collections import deque
+from functools import lru_cache
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 # ============================================================
 # CONFIGURATION
@@ -22,15 +25,29 @@ if Path("/dev/shm").exists():
     WORK = Path(f"/dev/shm/{os.environ.get('USER', 'd4j')}_repair_work")
 else:
     WORK = Path(EXPROOT) / "d4j_repair_work"
+TRASH = WORK / ".trash"   # finished workdirs are renamed here and deleted by _reaper
 
 JAVA11     = os.environ.get("JAVA11_HOME", "/usr/lib/jvm/java-11-openjdk-amd64")
 JAVA8      = os.environ.get("JAVA8_HOME",  "/usr/lib/jvm/java-8-openjdk-amd64")
 MAJOR_JAVA_HOME = os.environ.get("MAJOR_JAVA_HOME", JAVA8)
 MAJOR_JAR  = Path(D4J_HOME) / "major/lib/major.jar" # Critical for direct execution
 
+# Java helper that validates many mutants in one JVM (compiled on first use)
+RUNNER_SRC = Path(__file__).resolve().parent / "BatchMutantRunner.java"
+RUNNER_DIR = WORK / ".runner"   # one subdirectory per source hash
+RUNNER_NO_MAJOR = 2   # BatchMutantRunner exit status: mutants cannot be switched in one JVM
+
 LOGS_ROOT  = Path(EXPROOT) / "logs"
 RESULTS    = Path(EXPROOT) / "results"
 RESULTS.mkdir(parents=True, exist_ok=True)
+CACHE      = Path(EXPROOT) / "cache"   # memoized `defects4j export` values per bug
+CHECKOUTS  = CACHE / "checkouts"       # pristine buggy checkouts (--checkout-cache), hard-linked into WORK
+
+# Bug ids are the leading numeric column of active-bugs.csv
+BUG_ID_RE = re.compile(rb"(?m)^(\d+),")
+
+# We only want to repair with mutants that survived regression
+KILLED_STATUSES = frozenset({b"KILLED", b"TIMEOUT", b"MEMORY_ERROR", b"RUNTIME_ERROR", b"EXC"})
 
 # ============================================================
 # HELPERS
@@ -41,6 +58,31 @@ def _mk_env(java_home: str) -> dict:
     e["PATH"] = f"{java_home}/bin:/usr/bin:" + e.get("PATH", "")
     return e
 
+# Java 11 environment, built once per pool worker by _worker_init
+_WORKER_ENV11 = None
+
+def _worker_init():
+    global _WORKER_ENV11
+    _WORKER_ENV11 = _mk_env(JAVA11)
+
+def discard(path: Path):
+    """Rename a workdir into TRASH so the caller need not wait for its deletion."""
+    TRASH.mkdir(parents=True, exist_ok=True)
+    try:
+        os.rename(path, TRASH / uuid.uuid4().hex)
+    except OSError:
+        shutil.rmtree(path, ignore_errors=True)
+
+def _reaper(stop: threading.Event, interval=5):
+    """Deletes whatever is in TRASH every `interval` seconds, and once more on stop."""
+    def sweep():
+        if TRASH.exists():
+            for d in TRASH.iterdir():
+                shutil.rmtree(d, ignore_errors=True)
+    while not stop.wait(interval):
+        sweep()
+    sweep()
+
 def run(cmd, cwd=None, env=None, check=True):
     # Capture output only on failure to keep logs clean
     p = subprocess.run(cmd, cwd=cwd, env=env, text=True, capture_output=True)
@@ -48,38 +90,183 @@ def run(cmd, cwd=None, env=None, check=True):
         raise RuntimeError(f"CMD Failed: {' '.join(cmd)}\nERR: {p.stderr}")
     return p
 
+def run_quiet(cmd, cwd=None, env=None, tail=200):
+    """
+    Like run(check=True) for chatty commands whose output only matters on failure:
+    stdout+stderr are streamed through a deque keeping the last `tail` lines.
+    """
+    p = subprocess.Popen(cmd, cwd=cwd, env=env, text=True, errors="replace",
+                         stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    with p.stdout:
+        last = deque(p.stdout, maxlen=tail)
+    p.wait()
+    if p.returncode != 0:
+        raise RuntimeError(f"CMD Failed: {' '.join(cmd)}\nERR: {''.join(last)}")
+    return p
+
+def _checkout_cache_usable() -> bool:
+    """CHECKOUTS can only be hard-linked into WORK when both are on the same filesystem."""
+    try:
+        CHECKOUTS.mkdir(parents=True, exist_ok=True)
+        WORK.mkdir(parents=True, exist_ok=True)
+        return os.stat(CHECKOUTS).st_dev == os.stat(WORK).st_dev
+    except OSError:
+        return False
+
+def checkout_buggy(project, bug, wd: Path, env, use_cache=False):
+    """
+    Materializes the buggy checkout of (project, bug) at `wd`, normally with a plain
+    `defects4j checkout`. With use_cache (only set when CHECKOUTS and WORK share a
+    filesystem), the first run checks it out into CHECKOUTS and later runs clone that
+    tree with `cp -al` (hard links). Compiling only creates new files, so the cached
+    sources are never written through a link. The cache is never evicted.
+    """
+    if not use_cache:
+        run_quiet([DEFECTS4J, "checkout", "-p", project, "-v", f"{bug}b", "-w", str(wd)], env=env)
+        return
+
+    pristine = CHECKOUTS / f"{project}-{bug}b"
+    marker = pristine / ".d4j_ok"
+    if not marker.exists():
+        shutil.rmtree(pristine, ignore_errors=True)
+        pristine.parent.mkdir(parents=True, exist_ok=True)
+        run_quiet([DEFECTS4J, "checkout", "-p", project, "-v", f"{bug}b", "-w", str(pristine)], env=env)
+        marker.write_text("1")
+
+    try:
+        run_quiet(["cp", "-al", str(pristine), str(wd)])
+    except RuntimeError:
+        shutil.rmtree(wd, ignore_errors=True)
+        run_quiet(["cp", "-a", str(pristine), str(wd)])
+    (wd / ".d4j_ok").unlink()
+
+@lru_cache(maxsize=None)
+def _log_index() -> dict:
+    """{bug dir name: DirEntry} for LOGS_ROOT, from one scandir per process."""
+    try:
+        with os.scandir(LOGS_ROOT) as it:
+            return {e.name: e for e in it if e.is_dir()}
+    except FileNotFoundError:
+        return {}
+
 def parse_live_mutants(project, bug):
-    log_dir = LOGS_ROOT / f"{project}-{bug}"
-    mutants_log = log_dir / "mutants.log"
-    kill_csv    = log_dir / "kill.csv"
+    entry = _log_index().get(f"{project}-{bug}")
+    if entry is None:
+        return [], 0
 
-    if not mutants_log.exists() or not kill_csv.exists():
+    # Missing files show up as FileNotFoundError instead of two exists() stats
+    try:
+        with open(os.path.join(entry.path, "kill.csv"), "rb") as f:
+            kill_data = f.read()
+        with open(os.path.join(entry.path, "mutants.log"), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
         return [], 0
 
-    # Get Killed IDs
-    killed_ids = set()
-    if kill_csv.exists():
-        with kill_csv.open("r", errors="ignore") as f:
-            reader = csv.reader(f)
-            next(reader, None)
-            for row in reader:
-                if not row: continue
-                status = row[-1].upper()
-                # We only want to repair with mutants that survived regression
-                if status in ["KILLED", "TIMEOUT", "MEMORY_ERROR", "RUNTIME_ERROR", "EXC"]:
-                    killed_ids.add(row[0])
+    # Get Killed IDs (as bytes; csv.reader is only needed for quoted files)
+    if b'"' in kill_data:
+        rows = csv.reader(kill_data.decode("utf-8", errors="ignore").splitlines()[1:])
+        killed_ids = {row[0].encode() for row in rows
+                      if row and row[-1].upper().encode() in KILLED_STATUSES}
+    else:
+        killed_ids = {line[:line.find(b",")] for line in kill_data.splitlines()[1:]
+                      if b"," in line and line.rsplit(b",", 1)[1].strip().upper() in KILLED_STATUSES}
 
     # Get Live IDs
-    live_ids = []
-    total_count = 0
-    with mutants_log.open("r", errors="ignore") as f:
-        for line in f:
-            total_count += 1
-            mid = line.split(":")[0]
-            if mid not in killed_ids:
-                live_ids.append(mid)
+    # Every mutant killed (kill.csv and mutants.log come from the same run):
+    # the count is enough, no need to split the log
+    total_count = data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0)
+    if len(killed_ids) >= total_count:
+        return [], total_count
+
+    live_ids = [mid.decode("utf-8", errors="ignore")
+                for mid in (line.partition(b":")[0] for line in data.splitlines())
+                if mid not in killed_ids]
     return live_ids, total_count
 
+def mutant_lines(project, bug, wanted):
+    """Returns {mutant_id: (source file, line)} from mutants.log for the ids in `wanted`."""
+    # id:OP:from:to:class[@method]:line:offset:description
+    locations = {}
+    with (LOGS_ROOT / f"{project}-{bug}" / "mutants.log").open("r", errors="ignore") as f:
+        for line in f:
+            parts = line.split(":", 6)
+            if len(parts) < 6 or parts[0] not in wanted or not parts[5].isdigit():
+                continue
+            top_class = parts[4].split("@", 1)[0].split("$", 1)[0]
+            locations[parts[0]] = (top_class.replace(".", "/") + ".java", int(parts[5]))
+    return locations
+
+EXPORT_PROPS = ["cp.test", "dir.bin.classes", "dir.bin.tests", "tests.trigger"]
+
+def _checkout_key(wd):
+    """sha1 of wd/defects4j.build.properties, which identifies the checked-out bug."""
+    build_props = Path(wd) / "defects4j.build.properties"
+    return hashlib.sha1(build_props.read_bytes()).hexdigest() if build_props.exists() else ""
+
+def _exported_props(project, bug, wd, env):
+    """
+    Returns {prop: value} for EXPORT_PROPS, cached in CACHE/<project>-<bug>.json.
+    The values hold absolute paths under wd and D4J_HOME, so the cache is keyed
+    by both paths and a sha1 of the contents of wd/defects4j.build.properties:
+    a fresh checkout of the same bug in the same place reuses it, anything else
+    re-runs `defects4j export`.
+    """
+    key = f"{_checkout_key(wd)}\t{Path(wd).resolve()}\t{D4J_HOME}"
+    cache_file = CACHE / f"{project}-{bug}.json"
+    try:
+        cached = json.loads(cache_file.read_text())
+        if cached.get("key") == key:
+            return cached["props"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    props = {p: run([DEFECTS4J, "export", "-p", p], cwd=str(wd), env=env).stdout for p in EXPORT_PROPS}
+    CACHE.mkdir(parents=True, exist_ok=True)
+    tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"key": key, "props": props}))
+    os.replace(tmp, cache_file)
+    return props
+
+def _trigger_coverage(project, bug, wd, env, trigger_test, classes_dir):
+    """
+    Returns {(source file, line)} executed by trigger_test on the buggy revision, via
+    `defects4j coverage` (Cobertura), cached in CACHE/<project>-<bug>.cov under the
+    checkout's build-properties hash and the trigger test.
+    Returns None if coverage is unavailable. Coverage compiles the sources, so
+    `classes_dir` is removed afterwards to make the MAJOR compile start clean.
+    """
+    key = f"{_checkout_key(wd)}\t{trigger_test}"
+    cache_file = CACHE / f"{project}-{bug}.cov"
+    try:
+        header, *rows = cache_file.read_text().splitlines()
+        if header == key:
+            return {(src, int(n)) for src, n in (row.split("\t") for row in rows)}
+    except (OSError, ValueError):
+        pass
+
+    try:
+        run_quiet([DEFECTS4J, "coverage", "-t", trigger_test], cwd=str(wd), env=env)
+        root = ET.parse(Path(wd) / "coverage.xml").getroot()
+    except (RuntimeError, OSError, ET.ParseError) as e:
+        print(f"[{project}-{bug}] No trigger coverage ({e}); validating all live mutants")
+        return None
+    finally:
+        shutil.rmtree(Path(wd) / classes_dir, ignore_errors=True)
+
+    covered = set()
+    for cls in root.iter("class"):
+        src = cls.get("filename")
+        for line in cls.iter("line"):
+            if int(line.get("hits", "0")) > 0:
+                covered.add((src, int(line.get("number"))))
+
+    CACHE.mkdir(parents=True, exist_ok=True)
+    tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text("\n".join([key] + [f"{src}\t{n}" for src, n in sorted(covered)]))
+    os.replace(tmp, cache_file)
+    return covered
+
 # ============================================================
 # FAST VALIDATION (Direct JVM)
 # ============================================================
@@ -95,48 +282,139 @@ def validate_mutant_fast(cwd, env, java_cmd, classpath, trigger_test, mutant_id)
         trigger_test
     ]
 
-    # We assume the test fails if it prints "FAILURES!!!" or return code != 0
-    p = subprocess.run(cmd, cwd=str(cwd), env=env, text=True, capture_output=True)
-    
-    # JUnitCore returns 0 if all tests pass, 1 if failure
-    if p.returncode == 0:
-        # Double check output just in case
-        if "OK (" in p.stdout:
-            return True
-    return False
-
-def process_bug(project, bug):
-    env11 = _mk_env(JAVA11)
+    # JUnitCore exits with 0 if all tests pass, 1 on failure; its output is not needed
+    p = subprocess.run(cmd, cwd=str(cwd), env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return p.returncode == 0
+
+def build_batch_runner(env, classpath) -> Path:
+    """
+    Compiles BatchMutantRunner once per version of its source and returns the class
+    directory, RUNNER_DIR/<sha1 of the source>; safe with concurrent workers.
+    """
+    target = RUNNER_DIR / hashlib.sha1(RUNNER_SRC.read_bytes()).hexdigest()
+    if not target.exists():
+        tmp = RUNNER_DIR / f"build-{os.getpid()}"
+        tmp.mkdir(parents=True, exist_ok=True)
+        try:
+            run([f"{JAVA11}/bin/javac", "-cp", classpath, "-d", str(tmp), str(RUNNER_SRC)], env=env)
+            os.rename(tmp, target)
+        except OSError:
+            pass  # another worker published the same version first
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+    return target
+
+def validate_mutants_batch(runner_dir, cwd, env, java_cmd, classpath, trigger_test, mutant_ids, threads=1):
+    """
+    Runs the trigger test for every mutant in one JVM (BatchMutantRunner) instead of
+    one JVM per mutant. Returns the number of mutants for which the test passes.
+    If a mutant crashes the JVM it counts as failing and the JVM is restarted;
+    two JVMs in a row that die before answering raise RuntimeError, as does a
+    runner that cannot activate mutants (the caller then uses one JVM per mutant).
+    Each mutant runs in its own class loader, so static state starts fresh.
+    With threads > 1 the runner validates mutants concurrently; mutants left
+    unanswered by a crash are retried one by one.
+    """
+    cmd = [java_cmd, "-cp", f"{runner_dir}:{classpath}", "BatchMutantRunner", trigger_test]
+    if threads > 1:
+        proc = subprocess.Popen(cmd + [str(threads)], cwd=str(cwd), env=env, text=True,
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL)
+        try:
+            out, _ = proc.communicate("".join(f"{mid}\n" for mid in mutant_ids))
+        except BrokenPipeError:
+            out = proc.stdout.read()
+            proc.wait()
+        if proc.returncode == RUNNER_NO_MAJOR:
+            raise RuntimeError("BatchMutantRunner cannot activate Major mutants")
+        answered = {}
+        for reply in out.splitlines():
+            verdict, _, mid = reply.partition(" ")
+            answered[mid] = verdict
+        plausible = sum(1 for verdict in answered.values() if verdict == "OK")
+        pending = [mid for mid in mutant_ids if mid not in answered]
+        if pending:
+            plausible += validate_mutants_batch(runner_dir, cwd, env, java_cmd, classpath, trigger_test, pending)
+        return plausible
+
+    plausible = 0
+    silent_starts = 0
+    i = 0
+    while i < len(mutant_ids):
+        proc = subprocess.Popen(cmd, cwd=str(cwd), env=env, text=True,
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL)
+        answered = 0
+        try:
+            while i < len(mutant_ids):
+                mid = mutant_ids[i]
+                i += 1
+                proc.stdin.write(f"{mid}\n")
+                proc.stdin.flush()
+                reply = proc.stdout.readline()
+                if not reply:
+                    break
+                answered += 1
+                if reply.startswith("OK "):
+                    plausible += 1
+        except BrokenPipeError:
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+            proc.wait()
+        if proc.returncode == RUNNER_NO_MAJOR:
+            raise RuntimeError("BatchMutantRunner cannot activate Major mutants")
+        silent_starts = silent_starts + 1 if answered == 0 else 0
+        if silent_starts >= 2:
+            raise RuntimeError(f"BatchMutantRunner exited with code {proc.returncode}")
+    return plausible
+
+def process_bug(project, bug, threads=1, spawn_workers=1, use_cache=False):
+    env11 = _WORKER_ENV11 or _mk_env(JAVA11)
     
     live_ids, total_gen = parse_live_mutants(project, bug)
     if not live_ids:
         return [project, bug, total_gen, 0, 0]
 
     wd = WORK / f"{project}-{bug}"
-    if wd.exists(): shutil.rmtree(wd)
-    wd.mkdir(parents=True, exist_ok=True)
+    if wd.exists(): discard(wd)
+    wd.parent.mkdir(parents=True, exist_ok=True)
 
     try:
-        # 1. Checkout
-        run([DEFECTS4J, "checkout", "-p", project, "-v", f"{bug}b", "-w", str(wd)], env=env11)
-        
-        # 2. Get Properties (Trigger Test & Classpath)
-        # We export the full runtime classpath which includes test-deps
-        cp_res = run([DEFECTS4J, "export", "-p", "cp.test"], cwd=str(wd), env=env11)
-        raw_cp = cp_res.stdout.strip()
+        # 1. Checkout (with --checkout-cache, cloned from the pristine copy after the first run)
+        checkout_buggy(project, bug, wd, env11, use_cache)
         
-        # We also need the compiled classes folders
-        classes_res = run([DEFECTS4J, "export", "-p", "dir.bin.classes"], cwd=str(wd), env=env11)
-        tests_res   = run([DEFECTS4J, "export", "-p", "dir.bin.tests"], cwd=str(wd), env=env11)
-        
-        trigger_res = run([DEFECTS4J, "export", "-p", "tests.trigger"], cwd=str(wd), env=env11)
-        triggers = [t.strip() for t in trigger_res.stdout.splitlines() if t.strip()]
+        # 2. Get Properties (Trigger Test & Classpath), memoized per bug
+        # We export the full runtime classpath which includes test-deps,
+        # and the compiled classes folders
+        props = _exported_props(project, bug, wd, env11)
+        raw_cp = props["cp.test"].strip()
+
+        triggers = [t.strip() for t in props["tests.trigger"].splitlines() if t.strip()]
         
         if not triggers: 
             return [project, bug, total_gen, 0, 0]
 
         trigger_test = triggers[0]
 
+        # 2b. Skip mutants on lines the trigger test never executes: they behave
+        # like the buggy program, so the trigger keeps failing. Mutants in files
+        # absent from the coverage report are kept.
+        covered = _trigger_coverage(project, bug, wd, env11, trigger_test, props["dir.bin.classes"].strip())
+        if covered is not None:
+            covered_files = {src for src, _ in covered}
+            locations = mutant_lines(project, bug, set(live_ids))
+            kept = [mid for mid in live_ids
+                    if mid not in locations or locations[mid][0] not in covered_files or locations[mid] in covered]
+            print(f"[{project}-{bug}] Coverage skips {len(live_ids) - len(kept)} of {len(live_ids)} live mutants")
+            live_ids = kept
+            if not live_ids:
+                return [project, bug, total_gen, 0, 0]
+
         # 3. Compile with MAJOR
         # Prepare environment for Ant
         compile_env = env11.copy()
@@ -149,12 +427,12 @@ def process_bug(project, bug):
         existing_args = compile_env.get("ANT_ARGS", "")
         compile_env["ANT_ARGS"] = f"{existing_args} {' '.join(ant_flags)}".strip()
         
-        run([DEFECTS4J, "compile"], cwd=str(wd), env=compile_env)
+        run_quiet([DEFECTS4J, "compile"], cwd=str(wd), env=compile_env)
 
         # 4. Construct FAST Classpath
         # CP = major.jar + test_classpath + bin_classes + bin_tests
-        bin_cls = str(wd / classes_res.stdout.strip())
-        bin_tst = str(wd / tests_res.stdout.strip())
+        bin_cls = str(wd / props["dir.bin.classes"].strip())
+        bin_tst = str(wd / props["dir.bin.tests"].strip())
         
         # Important: Major.jar must be in CP for runtime to work
         full_cp = f"{str(MAJOR_JAR)}:{bin_cls}:{bin_tst}:{raw_cp}"
@@ -164,11 +442,18 @@ def process_bug(project, bug):
         java_bin = f"{JAVA11}/bin/java"
 
         print(f"[{project}-{bug}] Testing {len(live_ids)} candidates via Direct JVM...")
-        
-        for mid in live_ids:
-            if validate_mutant_fast(wd, env11, java_bin, full_cp, trigger_test, mid):
-                # print(f"  -> {mid} FIXED")
-                plausible_count += 1
+
+        try:
+            runner_dir = build_batch_runner(env11, full_cp)
+            plausible_count = validate_mutants_batch(runner_dir, wd, env11, java_bin, full_cp, trigger_test, live_ids, threads)
+        except RuntimeError as e:
+            # Fall back to one JVM per mutant; the JVMs are independent, so up to
+            # spawn_workers of them run at once
+            print(f"[{project}-{bug}] Batch runner unavailable ({e}); using one JVM per mutant")
+            with ThreadPoolExecutor(max_workers=spawn_workers) as tp:
+                results = tp.map(lambda mid: validate_mutant_fast(wd, env11, java_bin, full_cp, trigger_test, mid),
+                                 live_ids)
+                plausible_count = sum(results)
 
         return [project, bug, total_gen, plausible_count, plausible_count]
 
@@ -176,8 +461,8 @@ def process_bug(project, bug):
         print(f"[{project}-{bug}] Error: {e}")
         return [project, bug, total_gen, 0, 0]
     finally:
-        # Cleanup RAM disk
-        if wd.exists(): shutil.rmtree(wd)
+        # Cleanup RAM disk (deleted in the background by the parent's reaper)
+        if wd.exists(): discard(wd)
 
 # ============================================================
 # MAIN
@@ -186,6 +471,13 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("project")
     parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=1,
+                        help="Mutants validated concurrently inside each bug's JVM (isolated class loaders). "
+                             "Tests still share JVM-wide state (default Locale/TimeZone, system properties, "
+                             "System.out/err), so keep 1 for projects whose tests change it, e.g. Lang, Time, Closure")
+    parser.add_argument("--checkout-cache", action="store_true",
+                        help=f"Keep pristine buggy checkouts in {CHECKOUTS} and hard-link them into the work dir "
+                             "(needs both on one filesystem; the cache grows by one checkout per bug)")
     args = parser.parse_args()
     
     project = args.project
@@ -196,24 +488,43 @@ def main():
         print("Project not found.")
         sys.exit(1)
         
-    bugs = [line.split(",")[0] for line in f.read_text().splitlines() if re.match(r"^\d+", line)]
+    bugs = [m.group(1).decode() for m in BUG_ID_RE.finditer(f.read_bytes())]
     bugs.sort(key=int)
     
     # Maximize CPU usage (one bug per core)
     workers = args.jobs
+    # JVMs per bug when falling back to one JVM per mutant, without oversubscribing
+    spawn_workers = max(1, (os.cpu_count() or 1) // workers)
     print(f"Starting Turbo Repair on {project} with {workers} workers...")
+
+    use_cache = args.checkout_cache and _checkout_cache_usable()
+    if args.checkout_cache and not use_cache:
+        print(f"Checkout cache disabled: {CHECKOUTS} and {WORK} are on different filesystems")
     
+    stop_reaper = threading.Event()
+    reaper = threading.Thread(target=_reaper, args=(stop_reaper,), daemon=True)
+
+    # One handle for the whole run; each row is flushed as soon as its bug finishes
     outfile = RESULTS / f"{project}_apr_summary.csv"
-    with outfile.open("w", newline="") as f:
-        csv.writer(f).writerow(["Project", "Bug", "Gen_Patches", "Plausible_Patches", "Correct_Patches"])
-
-    with ProcessPoolExecutor(max_workers=workers) as ex:
-        futs = {ex.submit(process_bug, project, b): b for b in bugs}
-        for fut in as_completed(futs):
-            res = fut.result()
-            print(f"[{res[0]}-{res[1]}] Gen: {res[2]}, Plaus: {res[3]}")
-            with outfile.open("a", newline="") as f:
-                csv.writer(f).writerow(res)
+    try:
+        with outfile.open("w", newline="") as out, ProcessPoolExecutor(max_workers=workers, initializer=_worker_init) as ex:
+            writer = csv.writer(out)
+            writer.writerow(["Project", "Bug", "Gen_Patches", "Plausible_Patches", "Correct_Patches"])
+            out.flush()
+
+            futs = {ex.submit(process_bug, project, b, args.threads, spawn_workers, use_cache): b for b in bugs}
+            # The fork-based pool launches all its workers on the first submit;
+            # starting the thread only now keeps it out of the forked children
+            reaper.start()
+            for fut in as_completed(futs):
+                res = fut.result()
+                print(f"[{res[0]}-{res[1]}] Gen: {res[2]}, Plaus: {res[3]}")
+                writer.writerow(res)
+                out.flush()
+    finally:
+        stop_reaper.set()
+        if reaper.is_alive():
+            reaper.join()   # final sweep empties TRASH
 
 if __name__ == "__main__":
     main()
@@ -7,10 +7,14 @@ OPTIMIZED FOR BATCH EXECUTION:
 - Saves results incrementally (so you don't lose data if it crashes).
 """
 
-import os, re, csv, sys, shutil, subprocess, argparse
+import os, re, csv, sys, shutil, itertools, subprocess, argparse
+import multiprocessing
 from pathlib import Path
+from dataclasses import dataclass
+from collections import deque
+from functools import lru_cache
 from typing import List, Tuple, Set, Optional
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 # ============================================================
 # CONFIG
@@ -27,6 +31,18 @@ WORK       = Path(EXPROOT) / "d4j_work"; WORK.mkdir(parents=True, exist_ok=True)
 LOGS_ROOT  = Path(EXPROOT) / "logs";     LOGS_ROOT.mkdir(parents=True, exist_ok=True)
 RESULTS    = Path(EXPROOT) / "results";  RESULTS.mkdir(parents=True, exist_ok=True)
 
+# Summary lines printed by `defects4j mutation`
+_GEN_RE  = re.compile(r"Mutants generated:\s*(\d+)")
+_KILL_RE = re.compile(r"Mutants killed:\s*(\d+)")
+
+# Statuses counted as killed, compared upper-cased (PIT itself writes KILLED/TIMED_OUT/MEMORY_ERROR)
+PIT_KILLED = frozenset({"KILLED", "TIMEOUT", "TIMED_OUT", "MEMORYERROR", "MEMORY_ERROR"})
+MAJOR_KILLED = frozenset({"KILLED", "TIMEOUT", "MEMORYERROR"})
+PIT_STATUS_COL = 5   # file,class,mutator,method,line,status,tests in header-less CSV reports
+
+# Header of the per-bug engine summaries and of the project summary
+SUMMARY_HEADER = ["engine", "project", "bug", "mutants_total", "killed", "survived"]
+
 # ============================================================
 # ENVIRONMENT HELPERS
 # ============================================================
@@ -45,6 +61,17 @@ def _mk_env(java_home: str, jvm_xmx: str = "8g") -> dict:
     e["ANT_ARGS"] = "-Dhaltonfailure=false"
     return e
 
+# Java 11/8 environments, built once per process by _worker_init (pool initializer).
+# They are only ever passed to subprocess, which does not modify them.
+ENV11 = ENV8 = ENV11_PIT = None
+
+def _worker_init(jvm_xmx: str):
+    global ENV11, ENV8, ENV11_PIT
+    ENV11 = _mk_env(JAVA11, jvm_xmx=jvm_xmx)
+    ENV8  = _mk_env(JAVA8,  jvm_xmx=jvm_xmx)
+    # Env fix for 'defects4j compile -D...' issue (PIT checkouts)
+    ENV11_PIT = dict(ENV11, ANT_ARGS=f"{ENV11.get('ANT_ARGS', '')} -Dbuild.compiler=modern".strip())
+
 # ============================================================
 # UTILITY FUNCTIONS
 # ============================================================
@@ -56,11 +83,53 @@ def run(cmd: List[str], cwd: Optional[str] = None, env=None, check: bool = True)
         raise RuntimeError(f"Command failed ({p.returncode}): {' '.join(cmd)}")
     return p
 
-def list_bugs(project: str) -> List[str]:
+@dataclass
+class MutationRun:
+    """Exit code of a `defects4j mutation` run and the file holding its output."""
+    returncode: int
+    log: Path
+
+    def counts(self) -> Tuple[Optional[int], Optional[int]]:
+        """Scans the output for the generated/killed counts (None when not printed)."""
+        generated = killed = None
+        with self.log.open(errors="replace") as f:
+            for line in f:
+                if generated is None:
+                    m = _GEN_RE.search(line)
+                    if m: generated = int(m.group(1))
+                if killed is None:
+                    m = _KILL_RE.search(line)
+                    if m: killed = int(m.group(1))
+                if generated is not None and killed is not None:
+                    break
+        return generated, killed
+
+    def tail(self, lines: int = 20) -> str:
+        """Last `lines` lines of the output, for failure reports."""
+        with self.log.open(errors="replace") as f:
+            return "".join(deque(f, maxlen=lines))
+
+    def check(self):
+        """Raises with the output's tail if `defects4j mutation` failed."""
+        if self.returncode != 0:
+            raise RuntimeError(f"defects4j mutation exited {self.returncode} (log: {self.log})\n{self.tail()}")
+
+def run_mutation(cmd: List[str], log: Path, cwd: Optional[str] = None, env=None) -> MutationRun:
+    """
+    Runs `defects4j mutation` with stdout and stderr written straight to `log`,
+    so the output never passes through Python; it is only read back on demand.
+    `log` belongs in the bug's logs dir, which outlives the checkout.
+    """
+    with log.open("wb") as f:
+        p = subprocess.run(cmd, cwd=cwd, env=env, stdout=f, stderr=subprocess.STDOUT)
+    return MutationRun(p.returncode, log)
+
+@lru_cache(maxsize=None)
+def list_bugs(project: str) -> Tuple[str, ...]:
     f = Path(D4J_HOME) / f"framework/projects/{project}/active-bugs.csv"
     if not f.exists(): raise FileNotFoundError(f"{f} not found")
-    ids = [line.split(",")[0].strip() for line in f.read_text().splitlines() if re.match(r"^\d+", line)]
-    return sorted(set(ids), key=lambda x: int(x))
+    ids = [line.split(",")[0].strip() for line in f.read_text().splitlines() if line[:1].isdigit()]
+    return tuple(sorted(set(ids), key=int))
 
 def checkout_rev(project: str, bug: str, rev: str, suffix: str, env11) -> Path:
     tgt = WORK / f"{project}-{bug}-{rev}-{suffix}"
@@ -74,8 +143,8 @@ def export_prop(prop: str, wd: Path, env11) -> str:
     p = run([DEFECTS4J, "export", "-p", prop], cwd=str(wd), env=env11, check=False)
     return (p.stdout or "").strip()
 
-def remove_triggering_tests(wd: Path, env11):
-    triggering_raw = export_prop("tests.trigger", wd, env11)
+def remove_triggering_tests(wd: Path, triggering_raw: str):
+    """Deletes the test classes named in `triggering_raw` (the tests.trigger export)."""
     triggers = set()
     for line in triggering_raw.splitlines():
         line = line.strip()
@@ -85,22 +154,52 @@ def remove_triggering_tests(wd: Path, env11):
     if not triggers: return
 
     # print(f"    Removing triggering tests: {triggers}")
-    for t_class in triggers:
-        simple_name = t_class.split(".")[-1]
-        found_files = list(wd.rglob(f"{simple_name}.java"))
-        for f in found_files:
-            f.unlink()
+    # One walk over the checkout (skipping .git) instead of an rglob per class
+    simple_names = {t_class.split(".")[-1] for t_class in triggers}
+    for root, dirs, files in os.walk(wd):
+        dirs[:] = [d for d in dirs if d != ".git"]
+        for name in files:
+            if name.endswith(".java") and name[:-5] in simple_names:
+                os.unlink(os.path.join(root, name))
 
 def _unique_pkg_prefixes(names: List[str]) -> Set[str]:
     pkgs = set()
     for c in names:
         c = c.replace("/", ".").replace(".java", "")
         if "." in c: pkgs.add(".".join(c.split(".")[:-1]))
-    result = set()
-    for p in sorted(pkgs):
-        if not any(p.startswith(q + ".") for q in result): result.add(p)
+    # Sorting by components puts each package right before its sub-packages,
+    # so only the last kept package can be a prefix of the current one
+    result = []
+    for p in sorted(pkgs, key=lambda p: p.split(".")):
+        if not result or not p.startswith(result[-1] + "."): result.append(p)
     return {p + ".*" for p in result} if result else {"*"}
 
+def count_pit_csv(path: Path) -> Tuple[int, int]:
+    """(total, killed) for a PIT mutations CSV; the status column is resolved once."""
+    total = killed = 0
+    with path.open(newline="") as f:
+        rdr = csv.reader(f)
+        first = next(rdr, None)
+        if first is None:
+            return 0, 0
+        header = [h.strip().lower() for h in first]
+        status_idx = next((i for i, h in enumerate(header) if h in ("status", "result", "outcome")), None)
+        if status_idx is None:
+            # PIT's CSV report has no header: the first row is already a mutation
+            status_idx = PIT_STATUS_COL
+            rdr = itertools.chain([first], rdr)
+        for row in rdr:
+            if not row: continue
+            total += 1
+            if len(row) > status_idx and row[status_idx].upper() in PIT_KILLED:
+                killed += 1
+    return total, killed
+
+def _write_summary(path: Path, engine: str, project: str, bug: str,
+                   total: int, killed: int, survived: int):
+    with path.open("w", newline="") as f:
+        csv.writer(f).writerows([SUMMARY_HEADER, [engine, project, bug, total, killed, survived]])
+
 def check_already_done(project: str, bug: str) -> bool:
     """Check if we already have results for this bug."""
     out = LOGS_ROOT / f"{project}-{bug}"
@@ -111,13 +210,14 @@ def check_already_done(project: str, bug: str) -> bool:
 # ============================================================
 # MAJOR ENGINE
 # ============================================================
-def run_major(project: str, bug: str, bug_dir: Path, env11, env8) -> Tuple[int,int,int]:
+def run_major(project: str, bug: str, bug_dir: Path, env11, env8,
+              triggering_raw: str) -> Tuple[int,int,int]:
     out = LOGS_ROOT / f"{project}-{bug}"
     out.mkdir(parents=True, exist_ok=True)
     mutants_log = out / "mutants.log"
     kill_csv    = out / "kill.csv"
 
-    remove_triggering_tests(bug_dir, env11)
+    remove_triggering_tests(bug_dir, triggering_raw)
     run([DEFECTS4J, "compile"], cwd=str(bug_dir), env=env11, check=True)
 
     mut_cmd = [
@@ -130,19 +230,18 @@ def run_major(project: str, bug: str, bug_dir: Path, env11, env8) -> Tuple[int,i
         "-Dmajor.log.level=FINE"
     ]
 
-    res = run(mut_cmd, cwd=str(bug_dir), env=env11, check=False)
-
-    gen = kill = None
-    for line in (res.stdout or "").splitlines():
-        m = re.search(r"Mutants generated:\s*(\d+)", line)
-        if m: gen = int(m.group(1))
-        m = re.search(r"Mutants killed:\s*(\d+)", line)
-        if m: kill = int(m.group(1))
+    res = run_mutation(mut_cmd, out / "major.stdout.log", cwd=str(bug_dir), env=env11)
+    res.check()
+    gen, kill = res.counts()
 
-    if not mutants_log.exists() and (bug_dir/"mutants.log").exists():
-        shutil.copy2(bug_dir/"mutants.log", mutants_log)
-    if not kill_csv.exists() and (bug_dir/"kill.csv").exists():
-        shutil.copy2(bug_dir/"kill.csv", kill_csv)
+    # The checkout is removed after this engine, so the logs can be moved
+    for name, dest in (("mutants.log", mutants_log), ("kill.csv", kill_csv)):
+        src = bug_dir / name
+        if not dest.exists() and src.exists():
+            try:
+                os.replace(src, dest)
+            except OSError:  # WORK and LOGS_ROOT on different filesystems
+                shutil.copy2(src, dest)
 
     total = gen if gen is not None else 0
     killed = kill if kill is not None else 0
@@ -153,31 +252,25 @@ def run_major(project: str, bug: str, bug_dir: Path, env11, env8) -> Tuple[int,i
                 rows = list(csv.reader(f))
                 if len(rows) > 1:
                     total = len(rows) - 1
-                    killed = sum(1 for r in rows[1:] if r[-1].lower() in ['killed', 'timeout', 'memoryerror'])
+                    killed = sum(1 for r in rows[1:] if r[-1].upper() in MAJOR_KILLED)
         except: pass
 
     survived = max(0, total - killed)
     
-    with (out / "major_summary.csv").open("w", newline="") as f:
-        csv.writer(f).writerow(["engine","project","bug","mutants_total","killed","survived"])
-        csv.writer(f).writerow(["MAJOR", project, bug, total, killed, survived])
+    _write_summary(out / "major_summary.csv", "MAJOR", project, bug, total, killed, survived)
 
     return total, killed, survived
 
 # ============================================================
 # PIT ENGINE
 # ============================================================
-def run_pit(project: str, bug: str, bug_dir: Path, env11,
-            threads: int, fork_count: int, jvm_xmx: str) -> Tuple[int,int,int]:
+def run_pit(project: str, bug: str, bug_dir: Path, env11, compile_env,
+            threads: int, fork_count: int, jvm_xmx: str,
+            triggering_raw: str, classes_relevant: str) -> Tuple[int,int,int]:
     out = LOGS_ROOT / f"{project}-{bug}"
     out.mkdir(parents=True, exist_ok=True)
 
-    remove_triggering_tests(bug_dir, env11)
-    
-    # Env fix for 'defects4j compile -D...' issue
-    compile_env = env11.copy()
-    existing_args = compile_env.get("ANT_ARGS", "")
-    compile_env["ANT_ARGS"] = f"{existing_args} -Dbuild.compiler=modern".strip()
+    remove_triggering_tests(bug_dir, triggering_raw)
     run([DEFECTS4J, "compile"], cwd=str(bug_dir), env=compile_env, check=True)
 
     pit_params = [
@@ -194,13 +287,14 @@ def run_pit(project: str, bug: str, bug_dir: Path, env11,
         f"-Dpit.jvmArgs=-Xmx{jvm_xmx}"
     ]
 
-    classes_rel = [c.strip() for c in export_prop("classes.relevant", bug_dir, env11).splitlines() if c.strip()]
+    classes_rel = [c.strip() for c in classes_relevant.splitlines() if c.strip()]
     if classes_rel:
         pkgs = ",".join(sorted(_unique_pkg_prefixes(classes_rel)))
         pit_params.append(f"-Dpit.targetClasses={pkgs}")
     
-    res = run(pit_params, cwd=str(bug_dir), env=env11, check=False)
-    
+    res = run_mutation(pit_params, out / "pit.stdout.log", cwd=str(bug_dir), env=env11)
+    res.check()
+
     candidates = [out / "mutations.csv", out / "pitest-mutations.csv"]
     candidates += list(bug_dir.glob("**/pit-reports/**/mutations.csv"))
     found = next((p for p in candidates if p.exists()), None)
@@ -208,68 +302,73 @@ def run_pit(project: str, bug: str, bug_dir: Path, env11,
     total = killed = 0
     if found:
         shutil.copy2(found, out / "pit_mutations.csv")
-        with found.open(newline="") as f:
-            rdr = csv.DictReader(f)
-            for row in rdr:
-                total += 1
-                status = (row.get("Status") or row.get("status") or "").lower()
-                if status in ("killed", "timeout", "memoryerror"):
-                    killed += 1
+        total, killed = count_pit_csv(found)
     else:
-        for line in (res.stdout or "").splitlines():
-            if "Mutants generated" in line:
-                 m = re.search(r"(\d+)", line)
-                 if m: total = int(m.group(1))
-            if "Mutants killed" in line:
-                 m = re.search(r"(\d+)", line)
-                 if m: killed = int(m.group(1))
+        gen, kill = res.counts()
+        total = gen or 0
+        killed = kill or 0
 
     survived = max(0, total - killed)
-    with (out / "pit_summary.csv").open("w", newline="") as f:
-        csv.writer(f).writerow(["engine","project","bug","mutants_total","killed","survived"])
-        csv.writer(f).writerow(["PIT", project, bug, total, killed, survived])
+    _write_summary(out / "pit_summary.csv", "PIT", project, bug, total, killed, survived)
         
     return total, killed, survived
 
 # ============================================================
 # MAIN LOGIC
 # ============================================================
-def process_one_bug(project: str, bug: str, jvm_xmx: str, threads: int, forks: int) -> Tuple[str, List[List]]:
+def _run_engine(name: str, project: str, bug: str, wd: Path, engine, *args) -> Optional[Tuple[int,int,int]]:
+    """
+    Runs one engine on its checkout and removes the checkout. Returns None on failure:
+    no per-bug summary is written, so the bug is retried on the next run.
+    """
+    try:
+        return engine(project, bug, wd, *args)
+    except Exception as e:
+        print(f"[{project}-{bug}] {name} FAILED: {e}")
+        return None
+    finally:
+        shutil.rmtree(wd, ignore_errors=True)
+
+def process_one_bug(project: str, bug: str, jvm_xmx: str, threads: int, forks: int,
+                    inner_parallel: bool = True) -> Tuple[str, List[List]]:
     # Skip if done
     if check_already_done(project, bug):
         print(f"[SKIP] {project}-{bug} already completed.")
         return bug, []
 
-    env11 = _mk_env(JAVA11, jvm_xmx=jvm_xmx)
-    env8  = _mk_env(JAVA8,  jvm_xmx=jvm_xmx)
+    if ENV11 is None:  # sequential run: no pool initializer
+        _worker_init(jvm_xmx)
+    env11, env8 = ENV11, ENV8
     
     print(f"\n>>> PROCESSING {project}-{bug} <<<")
 
-    # 1. MAJOR
     major_dir = checkout_rev(project, bug, 'b', "major", env11)
-    try:
-        m_total, m_killed, m_surv = run_major(project, bug, major_dir, env11, env8)
-    except Exception as e:
-        print(f"[{project}-{bug}] MAJOR FAILED: {e}")
-        m_total, m_killed, m_surv = 0, 0, 0
-    finally:
-        shutil.rmtree(major_dir, ignore_errors=True)
+    # Both checkouts are the same revision: export the properties once per bug
+    triggering_raw = export_prop("tests.trigger", major_dir, env11)
+    classes_relevant = export_prop("classes.relevant", major_dir, env11)
 
-    # 2. PIT
-    pit_dir = checkout_rev(project, bug, 'b', "pit", env11)
-    try:
-        p_total, p_killed, p_surv = run_pit(project, bug, pit_dir, env11, threads, forks, jvm_xmx)
-    except Exception as e:
-        print(f"[{project}-{bug}] PIT FAILED: {e}")
-        p_total, p_killed, p_surv = 0, 0, 0
-    finally:
-        shutil.rmtree(pit_dir, ignore_errors=True)
+    # 1. MAJOR
+    def major():
+        return _run_engine("MAJOR", project, bug, major_dir, run_major, env11, env8, triggering_raw)
+
+    # 2. PIT (own checkout; writes different files under the same logs dir)
+    def pit():
+        pit_dir = checkout_rev(project, bug, 'b', "pit", env11)
+        return _run_engine("PIT", project, bug, pit_dir, run_pit, env11, ENV11_PIT, threads, forks, jvm_xmx,
+                           triggering_raw, classes_relevant)
+
+    # The two engines are independent JVM runs, so by default they overlap
+    if inner_parallel:
+        with ThreadPoolExecutor(max_workers=2) as tp:
+            f_major, f_pit = tp.submit(major), tp.submit(pit)
+            results = {"MAJOR": f_major.result(), "PIT": f_pit.result()}
+    else:
+        results = {"MAJOR": major(), "PIT": pit()}
 
-    rows = [
-        ["MAJOR", project, bug, m_total, m_killed, m_surv],
-        ["PIT",   project, bug, p_total, p_killed, p_surv]
-    ]
-    print(f"[{project}-{bug}] DONE. MAJOR: {m_total}, PIT: {p_total}")
+    # A failed engine gets no row rather than a row of zeros
+    rows = [[engine, project, bug, *counts] for engine, counts in results.items() if counts is not None]
+    print(f"[{project}-{bug}] DONE. " + ", ".join(
+        f"{engine}: {counts[0] if counts else 'FAILED'}" for engine, counts in results.items()))
     return bug, rows
 
 def main():
@@ -279,6 +378,10 @@ def main():
     parser.add_argument("--bugs")
     parser.add_argument("--jobs", type=int, default=1)
     parser.add_argument("--jvm-xmx", default="8g")
+    parser.add_argument("--inner-parallel", dest="inner_parallel", action="store_true", default=True,
+                        help="Run MAJOR and PIT of the same bug concurrently (default)")
+    parser.add_argument("--no-inner-parallel", dest="inner_parallel", action="store_false",
+                        help="Run MAJOR, then PIT (halves peak memory per bug)")
     args = parser.parse_args()
 
     project = args.project
@@ -287,38 +390,49 @@ def main():
     elif args.bug_id:
         bugs = [args.bug_id]
     else:
-        bugs = list_bugs(project)
+        bugs = list(list_bugs(project))
 
     print(f"=== {project}: {len(bugs)} bug(s) ===")
+
+    # Resumed runs: finished bugs are dropped here instead of being dispatched to a
+    # worker (process_one_bug keeps its own check for concurrent runs)
+    todo = [b for b in bugs if not check_already_done(project, b)]
+    if len(todo) < len(bugs):
+        print(f"[SKIP] {len(bugs) - len(todo)} bug(s) already completed.")
+    bugs = todo
     
-    # Prepare Output CSV with header
+    # Output CSV stays open for the whole run; line buffering makes every row
+    # durable as soon as its bug finishes. Header only if the file is new/empty.
     outcsv = RESULTS / f"{project}_buggy_summary.csv"
-    if not outcsv.exists():
-        with outcsv.open("w", newline="") as f:
-            csv.writer(f).writerow(["engine","project","bug","mutants_total","killed","survived"])
-
-    def save_rows(rows):
-        if not rows: return
-        with outcsv.open("a", newline="") as f:
-            csv.writer(f).writerows(rows)
-
-    # Running
-    if args.jobs > 1:
-        with ProcessPoolExecutor(max_workers=args.jobs) as ex:
-            futs = {ex.submit(process_one_bug, project, b, args.jvm_xmx, 1, 1): b for b in bugs}
-            for fut in as_completed(futs):
+    with outcsv.open("a", newline="", buffering=1) as fout:
+        writer = csv.writer(fout)
+        if fout.tell() == 0:
+            writer.writerow(SUMMARY_HEADER)
+
+        def save_rows(rows):
+            if not rows: return
+            writer.writerows(rows)
+
+        # Running
+        if args.jobs > 1:
+            # spawn: workers start clean instead of forking the parent's heap
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=args.jobs, mp_context=ctx,
+                                     initializer=_worker_init, initargs=(args.jvm_xmx,)) as ex:
+                futs = {ex.submit(process_one_bug, project, b, args.jvm_xmx, 1, 1, args.inner_parallel): b for b in bugs}
+                for fut in as_completed(futs):
+                    try:
+                        _, rows = fut.result()
+                        save_rows(rows) # Save immediately
+                    except Exception as e:
+                        print(f"CRITICAL FAIL: {e}")
+        else:
+            for b in bugs:
                 try:
-                    _, rows = fut.result()
+                    _, rows = process_one_bug(project, b, args.jvm_xmx, 1, 1, args.inner_parallel)
                     save_rows(rows) # Save immediately
                 except Exception as e:
-                    print(f"CRITICAL FAIL: {e}")
-    else:
-        for b in bugs:
-            try:
-                _, rows = process_one_bug(project, b, args.jvm_xmx, 1, 1)
-                save_rows(rows) # Save immediately
-            except Exception as e:
-                print(f"CRITICAL FAIL on {b}: {e}")
+                    print(f"CRITICAL FAIL on {b}: {e}")
 
     print(f"All Done. Results accumulated in {outcsv}")
 
@@ -1,82 +1,127 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import argparse, csv, json, re, sys
+import argparse, csv, fnmatch, os, re, sys
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 # ---------- Utils ----------
-def _read_csv_any(path: Path):
+def _iter_csv_any(path: Path, fields):
+    """
+    Yields, per CSV row, a tuple of the stripped cells under the given lower-case
+    header names (None where the column or the cell is missing). Stops quietly on read errors.
+    """
     try:
         with path.open("r", encoding="utf-8", errors="ignore") as f:
             rdr = csv.reader(f)
-            rows = list(rdr)
-            if not rows: return []
-            hdr = [h.strip().lower() for h in rows[0]]
-            out=[]
-            for r in rows[1:]:
+            first = next(rdr, None)
+            if first is None: return
+            # Column positions are looked up once; a repeated header name keeps its last column
+            pos = {h.strip().lower(): i for i, h in enumerate(first)}
+            idx = [pos.get(name) for name in fields]
+            for r in rdr:
                 if not r: continue
-                row = {hdr[i]: (r[i].strip() if i < len(hdr) else "") for i in range(len(hdr))}
-                out.append(row)
-            return out
+                n = len(r)
+                yield tuple(r[i].strip() if i is not None and i < n else None for i in idx)
     except Exception:
-        return []
+        return
+
+def _map_io(fn, items, min_threads=64):
+    """Ordered map() for IO-bound work; small inputs skip the thread pool and its start-up."""
+    if len(items) < min_threads:
+        return list(map(fn, items))
+    with ThreadPoolExecutor() as ex:
+        return list(ex.map(fn, items))
+
+def _write_csv(rows, path: Path):
+    """Writes dict rows (all with the same keys, in the same order); nothing if there are none."""
+    if not rows: return
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(rows[0].keys())
+        w.writerows(map(dict.values, rows))
 
 def _print_table(rows, cols, title=None):
     if title: print(f"\n== {title} ==")
     if not rows:
         print("No data."); return
-    w = {c: max(len(c), max(len(str(r.get(c,""))) for r in rows)) for c in cols}
-    print(" | ".join(c.ljust(w[c]) for c in cols))
-    print("-+-".join("-"*w[c] for c in cols))
-    for r in rows:
-        print(" | ".join(str(r.get(c,"")).ljust(w[c]) for c in cols))
+    cells = [[str(r.get(c,"")) for c in cols] for r in rows]
+    w = [max(len(c), max(len(row[i]) for row in cells)) for i, c in enumerate(cols)]
+    fmt = " | ".join(f"{{:<{n}}}" for n in w)
+    # One write for the whole table instead of a print() per row
+    lines = [fmt.format(*cols), "-+-".join("-"*n for n in w)]
+    lines += [fmt.format(*row) for row in cells]
+    sys.stdout.write("\n".join(lines) + "\n")
 
 # ---------- MUTATION SCAN (MAJOR / PIT) ----------
+_LOGS_RE = re.compile(r"[\\/](logs|LOGS)[\\/]([^\\/]+)-(\d+)[\\/]")
+
 def _infer_proj_bug_from_path(p: Path):
     s = str(p)
-    m = re.search(r"[\\/](logs|LOGS)[\\/]([^\\/]+)-(\d+)[\\/]", s)
+    m = _LOGS_RE.search(s)
     if m:
         return m.group(2), m.group(3)
     return None, None
 
+_SUMMARY_FIELDS = ("engine","project","bug","mutants_total","total","mutants","killed","survived")
+
 def parse_mutation_summary_file(path: Path, tool_hint: str):
-    rows = _read_csv_any(path)
+    # Cells arrive stripped from _iter_csv_any; the path fallback is the same for every row
     out=[]
-    for r in rows:
-        eng = (r.get("engine") or tool_hint or "").strip().upper()
-        proj = (r.get("project") or "").strip()
-        bug  = (r.get("bug") or "").strip()
-        tot  = int(r.get("mutants_total") or r.get("total") or r.get("mutants") or 0)
-        kld  = int(r.get("killed") or 0)
-        srv  = int(r.get("survived") or (tot - kld if tot>=kld else 0))
+    inferred = None
+    for eng, proj, bug, mtot, tot, muts, kld, srv in _iter_csv_any(path, _SUMMARY_FIELDS):
+        eng  = (eng or tool_hint or "").upper()
+        proj = proj or ""
+        bug  = bug or ""
+        tot  = int(mtot or tot or muts or 0)
+        kld  = int(kld or 0)
+        srv  = int(srv or (tot - kld if tot>=kld else 0))
         if not proj or not bug:
-            ip, ib = _infer_proj_bug_from_path(path)
+            if inferred is None: inferred = _infer_proj_bug_from_path(path)
+            ip, ib = inferred
             proj = proj or ip
             bug  = bug  or ib
         if proj and bug:
             out.append((proj, bug, eng or tool_hint, tot, kld, srv))
     return out
 
+def _scan_bugdir(bugdir: Path):
+    rows=[]
+    if not bugdir.is_dir(): return rows
+    msum = bugdir / "major_summary.csv"
+    psum = bugdir / "pit_summary.csv"
+    if msum.exists(): rows += parse_mutation_summary_file(msum, "MAJOR")
+    if psum.exists(): rows += parse_mutation_summary_file(psum, "PIT")
+    return rows
+
 def scan_mutation_logs(log_root: Path):
+    # Bug dirs are independent and the work is mostly file IO: read them on threads
+    # (the sorted order is kept)
     per_bug=[]
-    for bugdir in sorted(log_root.glob("*-*")):
-        if not bugdir.is_dir(): continue
-        msum = bugdir / "major_summary.csv"
-        psum = bugdir / "pit_summary.csv"
-        if msum.exists(): per_bug += parse_mutation_summary_file(msum, "MAJOR")
-        if psum.exists(): per_bug += parse_mutation_summary_file(psum, "PIT")
+    for rows in _map_io(_scan_bugdir, sorted(log_root.glob("*-*"))):
+        per_bug += rows
     return per_bug
 
 def aggregate_mutation(per_bug):
-    agg_by_tool = defaultdict(lambda: {"bugs": set(), "total": 0, "killed": 0, "survived": 0})
-    agg_all     = defaultdict(lambda: {"bugs": set(), "total": 0, "killed": 0, "survived": 0})
+    # "bugs" counts distinct bugs: one shared seen-set instead of a bug set per key
+    agg_by_tool = defaultdict(lambda: {"bugs": 0, "total": 0, "killed": 0, "survived": 0})
+    agg_all     = defaultdict(lambda: {"bugs": 0, "total": 0, "killed": 0, "survived": 0})
+    seen = set()
 
     for proj, bug, tool, tot, kld, srv in per_bug:
         A = agg_by_tool[(proj, tool)]
-        A["bugs"].add(bug); A["total"] += tot; A["killed"] += kld; A["survived"] += srv
+        if (proj, bug, tool) not in seen:
+            seen.add((proj, bug, tool)); A["bugs"] += 1
+        A["total"] += tot; A["killed"] += kld; A["survived"] += srv
+
+    # The combined rows are sums over the (few) tools of a project, not over all bugs again
+    for (proj, _), A in agg_by_tool.items():
         B = agg_all[proj]
-        B["bugs"].add(bug); B["total"] += tot; B["killed"] += kld; B["survived"] += srv
+        B["total"] += A["total"]; B["killed"] += A["killed"]; B["survived"] += A["survived"]
+    for proj, _ in {(proj, bug) for proj, bug, _ in seen}:
+        agg_all[proj]["bugs"] += 1
 
     proj_rows=[]
     for (proj, tool), A in sorted(agg_by_tool.items()):
@@ -84,7 +129,7 @@ def aggregate_mutation(per_bug):
         proj_rows.append({
             "project": proj,
             "tool": tool,
-            "bugs_covered": len(A["bugs"]),
+            "bugs_covered": A["bugs"],
             "mutants_total": total,
             "killed": killed,
             "survived": survived,
@@ -96,7 +141,7 @@ def aggregate_mutation(per_bug):
         proj_rows.append({
             "project": proj,
             "tool": "MAJOR+PIT",
-            "bugs_covered": len(A["bugs"]),
+            "bugs_covered": A["bugs"],
             "mutants_total": total,
             "killed": killed,
             "survived": survived,
@@ -117,11 +162,14 @@ def aggregate_mutation(per_bug):
     return proj_rows, bug_rows
 
 # ---------- APR SCAN ----------
-D4J_PROJECTS = {
+D4J_PROJECTS = frozenset(map(sys.intern, (
     "Time","Lang","Chart","Math","Closure","Mockito","Cli","Csv",
     "Compress","JxPath","Collections","Codec","Jsoup","Gson","JacksonCore",
     "JacksonDatabind","JacksonXml"
-}
+)))
+
+_PROJ_BUG_SINGLE_RE = re.compile(r"[\\/](?P<proj>[A-Za-z]+)-(?P<bug>\d+)(?:[\\/]|$)")
+_LEAD_DIGITS_RE = re.compile(r"(\d+)")
 
 def _read_lines(path: Path):
     try:
@@ -129,34 +177,50 @@ def _read_lines(path: Path):
     except Exception:
         return []
 
+_TRUTHY = frozenset({"1","true","yes"})
+_PLAUS_STATUS = frozenset({"PASS","PLAUSIBLE"})
+_CORRECT_STATUS = frozenset({"CORRECT","TRUE_POSITIVE"})
+
+@lru_cache(maxsize=None)
 def _auto_extract_from_test_results(bugdir: Path):
+    # Cached: _load_plausible and _load_correct both fall back to the same file,
+    # which is then parsed (and plausible.txt/correct.txt written) only once
     csv_path = bugdir / "test_results.csv"
     plausible, correct = set(), set()
     if not csv_path.exists():
-        return plausible, correct
+        return frozenset(plausible), frozenset(correct)
     try:
         with csv_path.open("r", encoding="utf-8", errors="ignore") as f:
             rdr = csv.DictReader(f)
             for r in rdr:
                 rid = r.get("id") or r.get("patch_id") or r.get("patch") or r.get("name")
+                if not rid: continue
                 status = (r.get("status") or r.get("result") or "").strip().upper()
-                is_plaus = (r.get("is_plausible") or "").strip().lower() in {"1","true","yes"} or status in {"PASS","PLAUSIBLE"}
-                is_correct = (r.get("is_correct") or "").strip().lower() in {"1","true","yes"} or status in {"CORRECT","TRUE_POSITIVE"}
-                if rid and is_plaus: plausible.add(rid)
-                if rid and is_correct: correct.add(rid)
+                if status in _PLAUS_STATUS or (r.get("is_plausible") or "").strip().lower() in _TRUTHY:
+                    plausible.add(rid)
+                if status in _CORRECT_STATUS or (r.get("is_correct") or "").strip().lower() in _TRUTHY:
+                    correct.add(rid)
         if plausible: (csv_path.parent / "plausible.txt").write_text("\n".join(sorted(plausible))+"\n")
         if correct:   (csv_path.parent / "correct.txt").write_text("\n".join(sorted(correct))+"\n")
     except Exception:
         pass
-    return plausible, correct
+    return frozenset(plausible), frozenset(correct)
 
-def _load_plausible(bugdir: Path):
+def _has(bugdir: Path, name: str, present):
+    # present: bugdir's listing from the APR scan, None to stat. A .txt list may have
+    # been written since the listing, by the test_results.csv extraction.
+    if present is None or (name.endswith(".txt") and "test_results.csv" in present):
+        return (bugdir / name).exists()
+    return name in present
+
+def _load_plausible(bugdir: Path, present=None):
     for name in ["plausible.txt","plausible.json","test_results.csv"]:
+        if not _has(bugdir, name, present): continue
         p = bugdir / name
-        if not p.exists(): continue
         if p.name == "plausible.txt":
             return set(_read_lines(p))
         if p.name == "plausible.json":
+            import json  # only runs with .json id lists need it
             try:
                 data = json.loads(p.read_text(encoding="utf-8", errors="ignore"))
                 if isinstance(data, list):
@@ -168,13 +232,14 @@ def _load_plausible(bugdir: Path):
             return plaus
     return set()
 
-def _load_correct(bugdir: Path):
+def _load_correct(bugdir: Path, present=None):
     for name in ["correct.txt","correct.json","test_results.csv"]:
+        if not _has(bugdir, name, present): continue
         p = bugdir / name
-        if not p.exists(): continue
         if p.name == "correct.txt":
             return set(_read_lines(p))
         if p.name == "correct.json":
+            import json  # only runs with .json id lists need it
             try:
                 data = json.loads(p.read_text(encoding="utf-8", errors="ignore"))
                 if isinstance(data, list):
@@ -186,22 +251,34 @@ def _load_correct(bugdir: Path):
             return corr
     return set()
 
-def _count_generated(bugdir: Path, patches_dirname: str, patterns):
+def _count_generated(bugdir: Path, patches_dirname: str, patterns, names=None):
+    # names: entries of bugdir when already listed, to skip the stat for an absent patches dir
     candidates=[]
-    if (bugdir/patches_dirname).is_dir():
+    if (names is None or patches_dirname.split("/")[0] in names) and (bugdir/patches_dirname).is_dir():
         candidates.append(bugdir/patches_dirname)
-    for alt in ["patches","generated_patches","output_patches","out/patches","results/patches"]:
-        candidates += list((bugdir).rglob(alt))
+    # One walk finds every patches dir below bugdir ("out/patches" and
+    # "results/patches" are named "patches" too)
+    alts = {"patches","generated_patches","output_patches"}
+    for root, dirs, _ in os.walk(bugdir):
+        for d in dirs:
+            if d in alts:
+                candidates.append(Path(root, d))
+            elif d in ("out","results") and os.path.islink(os.path.join(root, d)):
+                # os.walk does not enter linked dirs, but rglob("out/patches") looked inside
+                if (Path(root, d) / "patches").is_dir(): candidates.append(Path(root, d, "patches"))
     seen=set(); total=0
     for pd in candidates:
-        if not pd.is_dir(): continue
         if pd in seen: continue
         seen.add(pd)
+        # Walk each patches dir once and match every pattern against the names
+        names=[]
+        for _, dirs, files in os.walk(pd):
+            names += dirs; names += files
         for pat in patterns:
-            total += len(list(pd.rglob(pat)))
+            total += len(fnmatch.filter(names, pat)) if "/" not in pat else len(list(pd.rglob(pat)))
     return total
 
-def _find_project_bug_from_path(path: Path):
+def _find_project_bug_from_path(path: Path, resolve: bool = False):
     """
     Robustly infer (project, bug) from many layouts:
       - .../<Project>/<bug>/...
@@ -209,16 +286,17 @@ def _find_project_bug_from_path(path: Path):
       - .../logs/<Project>-<bug>/...
       - .../apr_runs/<Project>-<bug>/...
     """
-    # 1) Project/bug as adjacent path segments
-    parts = list(path.resolve().parts)
+    # 1) Project/bug as adjacent path segments. The path is made absolute lexically
+    # (no stat/readlink per component) unless symlinks have to be followed.
+    s = str(path.resolve()) if resolve else os.path.abspath(path)
+    parts = s.split(os.sep)
     for i, part in enumerate(parts):
         if part in D4J_PROJECTS and i+1 < len(parts):
-            m = re.match(r"(\d+)", parts[i+1])
+            m = _LEAD_DIGITS_RE.match(parts[i+1])
             if m: return part, m.group(1)
 
     # 2) Project-bug single segment anywhere (e.g., Time-19)
-    s = str(path.resolve())
-    m = re.search(r"[\\/](?P<proj>[A-Za-z]+)-(?P<bug>\d+)(?:[\\/]|$)", s)
+    m = _PROJ_BUG_SINGLE_RE.search(s)
     if m and m.group("proj") in D4J_PROJECTS:
         return m.group("proj"), m.group("bug")
 
@@ -229,38 +307,73 @@ def _find_project_bug_from_path(path: Path):
 
     return None, None
 
-def scan_apr(apr_root: Path, patches_dirname: str, gen_patterns, debug=False):
-    agg = defaultdict(lambda: {"bugs": set(), "generated": 0, "plausible": 0, "correct": 0, "fixed_bugs": set()})
-    candidates=set()
-    signals = {"plausible.txt","plausible.json","test_results.csv","correct.txt","correct.json"}
+PATCH_DIRS = {"patches","generated_patches"}
+APR_SIGNALS = PATCH_DIRS | {"plausible.txt","plausible.json","test_results.csv","correct.txt","correct.json"}
 
-    for p in apr_root.rglob("*"):
-        if not p.is_dir(): continue
+def _walk_apr(path: str, candidates):
+    """
+    Reads the directory `path` once and recurses into its subdirectories, mapping
+    those that look like APR bug dirs to their entry names in `candidates` (None:
+    only compute flags). Returns (is_candidate, has_patches, names): a dir is a
+    candidate if it holds a signal entry or has a patches dir anywhere below it;
+    has_patches also counts its own children. Like rglob/glob("**"), symlinked dirs are listed but not descended,
+    except that the patches probe starts inside a listed symlinked dir itself.
+    """
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return False, False, frozenset()
+    names = set()
+    below = False
+    for e in entries:
+        names.add(e.name)
         try:
-            names = {x.name for x in p.iterdir()}
-        except Exception:
-            names=set()
-        if ("patches" in names) or ("generated_patches" in names) or (signals & names):
-            candidates.add(p)
+            if not e.is_dir(): continue
+            link = e.is_symlink()
+        except OSError:
+            continue
+        if link:
+            if candidates is not None:
+                cand, _, child_names = _walk_apr(e.path, None)
+                if cand: candidates[Path(e.path)] = child_names
         else:
-            if list(p.glob("**/patches")) or list(p.glob("**/generated_patches")):
-                candidates.add(p)
+            cand, has_patches, child_names = _walk_apr(e.path, candidates)
+            if cand and candidates is not None:
+                candidates[Path(e.path)] = child_names
+            below = below or has_patches
+    names = frozenset(names)
+    return bool(names & APR_SIGNALS) or below, bool(names & PATCH_DIRS) or below, names
+
+def scan_apr(apr_root: Path, patches_dirname: str, gen_patterns, debug=False, resolve_paths=False):
+    agg = defaultdict(lambda: {"bugs": set(), "generated": 0, "plausible": 0, "correct": 0, "fixed_bugs": set()})
+    # Every directory below apr_root is read once (apr_root itself is never a candidate)
+    # and its entry names are kept for the per-candidate checks below
+    candidates={}
+    _walk_apr(str(apr_root), candidates)
 
     # optional debug: show how many APR candidates we saw
     if debug:
         print(f"[APR DEBUG] candidates found: {len(candidates)}", file=sys.stderr)
 
-    for bugdir in sorted(candidates):
-        proj, bug = _find_project_bug_from_path(bugdir)
+    def process(item):
+        bugdir, names = item
+        proj, bug = _find_project_bug_from_path(bugdir, resolve_paths)
+        if not proj or not bug:
+            return bugdir, None, None, 0, (), ()
+        gen  = _count_generated(bugdir, patches_dirname, gen_patterns, names)
+        plaus= _load_plausible(bugdir, names)
+        corr = _load_correct(bugdir, names)
+        return bugdir, proj, bug, gen, plaus, corr
+
+    # Candidates are scanned on threads; the results are merged here, in order
+    results = _map_io(process, sorted(candidates.items()))
+
+    for bugdir, proj, bug, gen, plaus, corr in results:
         if not proj or not bug:
             if debug:
                 print(f"[APR DEBUG] skip (no proj/bug): {bugdir}", file=sys.stderr)
             continue
 
-        gen  = _count_generated(bugdir, patches_dirname, gen_patterns)
-        plaus= _load_plausible(bugdir)
-        corr = _load_correct(bugdir)
-
         A = agg[proj]
         A["bugs"].add(bug)
         A["generated"] += gen
@@ -302,25 +415,18 @@ def main():
 
     mut_proj_csv = args.outdir / "mutation_summary_by_project.csv"
     mut_bug_csv  = args.outdir / "mutation_summary_by_bug.csv"
-    if proj_rows:
-        with mut_proj_csv.open("w", newline="", encoding="utf-8") as f:
-            w = csv.DictWriter(f, fieldnames=list(proj_rows[0].keys()))
-            w.writeheader(); w.writerows(proj_rows)
-    if bug_rows:
-        with mut_bug_csv.open("w", newline="", encoding="utf-8") as f:
-            w = csv.DictWriter(f, fieldnames=list(bug_rows[0].keys()))
-            w.writeheader(); w.writerows(bug_rows)
+    _write_csv(proj_rows, mut_proj_csv)
+    _write_csv(bug_rows, mut_bug_csv)
 
     _print_table(proj_rows, ["project","tool","bugs_covered","mutants_total","killed","survived","kill_rate"], "Mutation (project × tool)")
     _print_table(bug_rows, ["project","bug","tool","mutants_total","killed","survived","kill_rate"], "Mutation (per-bug)")
 
     # 2) APR summary by project
-    apr_rows = scan_apr(apr_root, args.patches_dirname, gen_patterns, debug=args.apr_debug)
+    # Project/bug names are read off the paths; only a symlinked APR root needs them resolved
+    apr_rows = scan_apr(apr_root, args.patches_dirname, gen_patterns, debug=args.apr_debug,
+                        resolve_paths=apr_root.is_symlink())
     apr_csv = args.outdir / "apr_summary_by_project.csv"
-    if apr_rows:
-        with apr_csv.open("w", newline="", encoding="utf-8") as f:
-            w = csv.DictWriter(f, fieldnames=list(apr_rows[0].keys()))
-            w.writeheader(); w.writerows(apr_rows)
+    _write_csv(apr_rows, apr_csv)
     _print_table(apr_rows, ["project","num_bugs","num_generated_patches","num_plausible_patches","num_correct_patches","num_fixed_bugs"], "APR (project totals)")
 
     # 3) Join APR + Mutation (use combined MAJOR+PIT row)
@@ -349,10 +455,7 @@ def main():
         })
 
     final_csv = args.outdir / "supervisor_table.csv"
-    if final_rows:
-        with final_csv.open("w", newline="", encoding="utf-8") as f:
-            w = csv.DictWriter(f, fieldnames=list(final_rows[0].keys()))
-            w.writeheader(); w.writerows(final_rows)
+    _write_csv(final_rows, final_csv)
 
     _print_table(final_rows, [
         "project","num_bugs","num_generated_patches","num_plausible_patches","num_correct_patches",
@@ -0,0 +1,58 @@
+import os
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import export_dev_patches as edp
+
+# Stand-in for `defects4j checkout -p <P> -v <id><rev> -w <dir>`; bug 2 always fails
+FAKE_DEFECTS4J = """#!/bin/sh
+[ "$1" = checkout ] || exit 1
+case "$5" in 2*) echo "cannot check out $5" >&2; exit 1;; esac
+mkdir -p "$7/src" && echo "version=$5" > "$7/src/A.java"
+"""
+
+
+class ExportProjectTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        d4j = root / "defects4j"
+        (d4j / "framework" / "bin").mkdir(parents=True)
+        (d4j / "framework" / "projects" / "Foo").mkdir(parents=True)
+        (d4j / "framework" / "projects" / "Foo" / "active-bugs.csv").write_text(
+            "bug.id,revision.id.buggy\n1,a\n2,b\n3,c\n")
+        fake = d4j / "framework" / "bin" / "defects4j"
+        fake.write_text(FAKE_DEFECTS4J)
+        fake.chmod(fake.stat().st_mode | stat.S_IXUSR)
+
+        self.saved = {name: getattr(edp, name) for name in ("D4J_HOME", "DEFECTS4J", "WORK", "OUT_ROOT")}
+        edp.D4J_HOME = str(d4j)
+        edp.DEFECTS4J = str(fake)
+        edp.WORK = root / "work"
+        edp.OUT_ROOT = root / "out"
+        edp.list_bugs.cache_clear()
+
+    def tearDown(self):
+        for name, value in self.saved.items():
+            setattr(edp, name, value)
+        edp.list_bugs.cache_clear()
+        self.tmp.cleanup()
+
+    def test_failed_checkout_skips_only_that_bug(self):
+        edp.export_project("Foo", jobs=2)
+
+        out_dir = edp.OUT_ROOT / "Foo"
+        self.assertEqual(sorted(os.listdir(out_dir)), ["Foo-1.diff", "Foo-3.diff"])
+        diff = (out_dir / "Foo-3.diff").read_text()
+        self.assertIn("-version=3b", diff)
+        self.assertIn("+version=3f", diff)
+
+
+if __name__ == "__main__":
+    unittest.main()